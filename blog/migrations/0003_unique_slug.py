@@ -0,0 +1,37 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:12
+
+from django.db import migrations, models
+
+from blog.utils import base_slug
+
+
+def fill_unique_slugs(apps, schema_editor):
+    Blog = apps.get_model("blog", "Blog")
+    used = set()
+    for blog in Blog.objects.order_by("pk").iterator():
+        slug = base = base_slug(blog.title)
+        suffix = 1
+        while slug in used:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        used.add(slug)
+        if blog.slug != slug:
+            Blog.objects.filter(pk=blog.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_unique_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="blog",
+            name="slug",
+            field=models.CharField(
+                blank=True, max_length=150, null=True, unique=True, verbose_name="slug"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_unique_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blog",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, verbose_name="Дата изменения записи"
+            ),
+        ),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
-from  blog.utils import upload_to
+import re
+
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+
+from blog.utils import base_slug, unique_slug, upload_to
+
+SLUG_CACHE_KEY = "blog:slug:{pk}"
 
 
 class Blog(models.Model):
@@ -15,16 +21,43 @@ class Blog(models.Model):
     created_at = models.DateField(
         blank=True, null=True, verbose_name="Дата создания записи"
     )
-    # updated_at = models.DateField(
-    #     blank=True, null=True, verbose_name="Дата изменения записи"
-    # )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения записи")
     views_count = models.IntegerField(default=0, verbose_name="Просмотров")
     is_published = models.BooleanField(default=True, verbose_name='Опубликовано')
-    slug = models.CharField(max_length=150, verbose_name='slug', null=True, blank=True)
+    slug = models.CharField(max_length=150, verbose_name='slug', unique=True, null=True, blank=True)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # slug вычисляется до записи, поэтому статья сохраняется одним запросом
+        if self.slug and re.fullmatch(rf"{re.escape(base_slug(self.title))}(-\d+)?", self.slug):
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_unique_slug(*args, **kwargs)
+        cache.delete(SLUG_CACHE_KEY.format(pk=self.pk))
+
+    def _save_with_unique_slug(self, *args, **kwargs):
+        attempts = 3
+        for attempt in range(attempts):
+            self.slug = unique_slug(Blog.objects.exclude(pk=self.pk), self.title)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Такой же slug мог только что занять параллельный запрос
+                if attempt == attempts - 1:
+                    raise
+
+    def delete(self, *args, **kwargs):
+        cache.delete(SLUG_CACHE_KEY.format(pk=self.pk))
+        return super().delete(*args, **kwargs)
+
     class Meta:
         verbose_name = "статья"
-        verbose_name_plural = "статьи"
\ No newline at end of file
+        verbose_name_plural = "статьи"
+        indexes = [
+            # Порядок и ключ курсорной пагинации BlogListView
+            models.Index(models.F("created_at").desc(), models.F("id").desc(), name="blog_created_idx"),
+        ]
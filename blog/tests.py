@@ -1,3 +1,103 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Blog
+from blog.views import AsyncBlogDetailView, AsyncBlogListView
+from catalog import counters
+
+# Страницы рендерятся без collectstatic: манифест хэшированных имён здесь не нужен
+PLAIN_STATIC_STORAGE = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGE)
+class AsyncBlogViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.blog = Blog.objects.create(title="Первая статья", body="Текст")
+
+    def setUp(self):
+        patcher = mock.patch.object(counters, "_buffer", counters.LocalCounterBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def get(self, view_class, **kwargs):
+        request = AsyncRequestFactory().get("/")
+        request.user = AnonymousUser()
+        response = await view_class.as_view()(request, **kwargs)
+        await sync_to_async(response.render)()
+        return response
+
+    async def test_list(self):
+        self.assertContains(await self.get(AsyncBlogListView), "Первая статья")
+
+    async def test_detail(self):
+        response = await self.get(AsyncBlogDetailView, slug=self.blog.slug)
+        self.assertContains(response, "Первая статья")
+        self.assertContains(response, "Просмотры: 1")
+        self.assertTrue(response.has_header("ETag"))
+
+
+class BlogSlugTest(TestCase):
+    def test_collision_suffix(self):
+        slugs = [Blog.objects.create(title="Первая статья", body="Текст").slug for _ in range(3)]
+        self.assertEqual(slugs, ["pervaya-statya", "pervaya-statya-2", "pervaya-statya-3"])
+
+    def test_numeric_title(self):
+        # Числовой slug совпал бы с адресом статьи по pk
+        self.assertEqual(Blog.objects.create(title="2024", body="Текст").slug, "post-2024")
+
+    def test_unchanged_title_keeps_slug(self):
+        blog = Blog.objects.create(title="Первая статья", body="Текст")
+        blog.body = "Новый текст"
+        with CaptureQueriesContext(connection) as queries:
+            blog.save()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(blog.slug, "pervaya-statya")
+
+    def test_title_change_updates_slug(self):
+        blog = Blog.objects.create(title="Первая статья", body="Текст")
+        blog.title = "Вторая статья"
+        blog.save()
+        self.assertEqual(blog.slug, "vtoraya-statya")
+
+    def test_integrity_error_retry(self):
+        Blog.objects.create(title="Первая статья", body="Текст")
+        # Параллельный запрос успел занять вычисленный slug: повторяем с новым
+        with mock.patch("blog.models.unique_slug", side_effect=["pervaya-statya", "pervaya-statya-2"]):
+            blog = Blog.objects.create(title="Первая статья", body="Текст")
+        self.assertEqual(Blog.objects.get(pk=blog.pk).slug, "pervaya-statya-2")
+
+    def test_integrity_error_after_all_attempts(self):
+        Blog.objects.create(title="Первая статья", body="Текст")
+        with mock.patch("blog.models.unique_slug", return_value="pervaya-statya") as unique_slug, \
+                self.assertRaises(IntegrityError):
+            Blog.objects.create(title="Первая статья", body="Текст")
+        self.assertEqual(unique_slug.call_count, 3)
+        self.assertEqual(Blog.objects.count(), 1)
+
+
+class BlogPkRedirectTest(TestCase):
+    def test_redirects_to_slug(self):
+        blog = Blog.objects.create(title="Первая статья", body="Текст")
+        response = self.client.get(reverse("blog:view_by_pk", args=[blog.pk]))
+        self.assertRedirects(response, reverse("blog:view", args=[blog.slug]), fetch_redirect_response=False)
+
+    def test_redirect_follows_renamed_article(self):
+        blog = Blog.objects.create(title="Первая статья", body="Текст")
+        self.client.get(reverse("blog:view_by_pk", args=[blog.pk]))
+        blog.title = "Вторая статья"
+        blog.save()
+        response = self.client.get(reverse("blog:view_by_pk", args=[blog.pk]))
+        self.assertRedirects(response, reverse("blog:view", args=["vtoraya-statya"]), fetch_redirect_response=False)
+
+    def test_missing_article(self):
+        self.assertEqual(self.client.get(reverse("blog:view_by_pk", args=[1])).status_code, 404)
@@ -1,20 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from blog.apps import BlogConfig
 from blog.views import (
+    AsyncBlogDetailView,
+    AsyncBlogListView,
     BlogCreateView,
     BlogListView,
     BlogDetailView,
     BlogUpdateView,
     BlogDeleteView,
+    blog_pk_redirect,
 )
 
 
 app_name = BlogConfig.name
 
+# Под ASGI (ASYNC_VIEWS=True) горячие страницы обслуживают async-версии представлений
+if settings.ASYNC_VIEWS:
+    list_view, detail_view = AsyncBlogListView, AsyncBlogDetailView
+else:
+    list_view, detail_view = BlogListView, BlogDetailView
+
 urlpatterns = [
     path("create/", BlogCreateView.as_view(), name="create"),
-    path("blog_list/", BlogListView.as_view(), name="list"),
-    path("view/<int:pk>/", BlogDetailView.as_view(), name="view"),
+    path("blog_list/", list_view.as_view(), name="list"),
+    path("view/<int:pk>/", blog_pk_redirect, name="view_by_pk"),
+    path("view/<slug:slug>/", detail_view.as_view(), name="view"),
     path("update/<int:pk>/", BlogUpdateView.as_view(), name="update"),
     path("delete/<int:pk>/", BlogDeleteView.as_view(), name="delete"),
-]
\ No newline at end of file
+]
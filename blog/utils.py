@@ -1,5 +1,34 @@
+import re
+
+from pytils.translit import slugify
+
+
 def upload_to(instance, filename):
     """
     Generate a file upload path based on the model type.
     """
-    return f"uploads/{instance.__class__.__name__.lower()}/{filename}"
\ No newline at end of file
+    return f"uploads/{instance.__class__.__name__.lower()}/{filename}"
+
+
+def base_slug(title, max_length=150):
+    """
+    Transliterated slug of the title; never purely numeric so it cannot clash with pk URLs.
+    """
+    slug = slugify(title)[: max_length - 10].strip("-") or "post"
+    if slug.isdigit():
+        slug = f"post-{slug}"
+    return slug
+
+
+def unique_slug(queryset, title, max_length=150):
+    """
+    Return a free slug for the title: "title", or "title-N" with the next unused N.
+    All candidates are fetched in one indexed prefix query instead of probing one by one.
+    """
+    base = base_slug(title, max_length)
+    taken = set(queryset.filter(slug__startswith=base).values_list("slug", flat=True))
+    if base not in taken:
+        return base
+    pattern = re.compile(rf"{re.escape(base)}-(\d+)")
+    suffixes = [int(match.group(1)) for slug in taken if (match := pattern.fullmatch(slug))]
+    return f"{base}-{max(suffixes, default=1) + 1}"
@@ -5,9 +5,13 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
 )
-from blog.models import Blog
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404, redirect
+from blog.models import Blog, SLUG_CACHE_KEY
+from catalog.counters import arecord_view, record_view
+from catalog.mixins import AsyncKeysetListMixin, AsyncSingleObjectMixin, ConditionalResponseMixin
+from catalog.pagination import KeysetPaginationMixin
 from django.urls import reverse_lazy, reverse
-from pytils.translit import slugify
 
 
 class BlogCreateView(CreateView):
@@ -15,17 +19,12 @@ class BlogCreateView(CreateView):
     fields = ("title", "body", "created_at", 'image')
     success_url = reverse_lazy("blog:list")
 
-    def form_valid(self, form):
-        if form.is_valid():
-            new_blog = form.save()
-            new_blog.slug = slugify(new_blog.title)
-            new_blog.save()
 
-        return super().form_valid(form)
-
-
-class BlogListView(ListView):
+class BlogListView(KeysetPaginationMixin, ListView):
     model = Blog
+    use_read_replica = True
+    paginate_by = 9
+    keyset_ordering = ("-created_at", "-pk")
 
     def get_queryset(self, *args, **kwargs):
         queryset = super().get_queryset(*args, **kwargs)
@@ -33,33 +32,64 @@ class BlogListView(ListView):
         return queryset
 
 
-class BlogDetailView(DetailView):
+class AsyncBlogListView(AsyncKeysetListMixin, BlogListView):
+    pass
+
+
+class BlogDetailView(ConditionalResponseMixin, DetailView):
     model = Blog
 
     def get_object(self, queryset=None):
-        self.object = super().get_object(queryset)
-        self.object.views_count += 1
-        self.object.save()
+        # Объект нужен и для ETag, и для рендеринга: загружаем его один раз
+        if not hasattr(self, 'object'):
+            self.object = super().get_object(queryset)
         return self.object
 
+    def get_etag_parts(self):
+        blog = self.get_object()
+        return blog.pk, blog.updated_at
+
+    def get_last_modified(self):
+        return self.get_object().updated_at
+
+    def get(self, request, *args, **kwargs):
+        # Просмотр учитывается и для ответа 304
+        record_view(self.get_object())
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        # В базу просмотр попадёт при очередном сбросе счётчиков, на странице учитываем его сразу
+        self.object.views_count += 1
+        return super().get_context_data(**kwargs)
+
+
+class AsyncBlogDetailView(AsyncSingleObjectMixin, BlogDetailView):
+    async def aprepare(self):
+        await super().aprepare()
+        await arecord_view(self.object)
+
+
+def blog_pk_redirect(request, pk):
+    """
+    Old pk URLs of articles redirect to their slug URLs.
+    """
+    cache_key = SLUG_CACHE_KEY.format(pk=pk)
+    slug = cache.get(cache_key)
+    if slug is None:
+        slug = get_object_or_404(Blog.objects.values_list("slug", flat=True), pk=pk)
+        cache.set(cache_key, slug)
+    return redirect("blog:view", slug=slug)
+
 
 class BlogUpdateView(UpdateView):
     model = Blog
     fields = ("title", "body")
     success_url = reverse_lazy("blog:list")
 
-    def form_valid(self, form):
-        if form.is_valid():
-            new_blog = form.save()
-            new_blog.slug = slugify(new_blog.title)
-            new_blog.save()
-
-        return super().form_valid(form)
-
     def get_success_url(self):
-        return reverse('blog:view', args=[self.kwargs.get('pk')])
+        return reverse('blog:view', args=[self.object.slug])
 
 
 class BlogDeleteView(DeleteView):
     model = Blog
-    success_url = reverse_lazy("blog:list")
\ No newline at end of file
+    success_url = reverse_lazy("blog:list")
@@ -1,24 +1,37 @@
 from django.contrib import admin
-from catalog.models import Product, Category, Version
+from catalog.admin_base import CachedValuesFieldListFilter, LargeTableAdmin
+from catalog.models import Product, Category, Version, ForbiddenWord
+from catalog.search import search_products
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     list_display = ("id", "product_name", "price", "category")
     list_filter = ("category",)
-    search_fields = (
-        "product_name",
-        "product_description",
-        "category",
-        "views_counter",
-    )
+    search_fields = ("product_name", "product_description")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идёт по тому же полнотекстовому индексу, что и на сайте
+        if not search_term.strip():
+            return queryset, False
+        return search_products(queryset, search_term), False
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("id", "category_name")
 
 @admin.register(Version)
-class VersionAdmin(admin.ModelAdmin):
+class VersionAdmin(LargeTableAdmin):
     list_display = ('id', 'product', 'version_number', 'version_name', 'is_current',)
-    list_filter = ('version_number', 'is_current', 'version_name',)
+    list_filter = (
+        ('version_number', CachedValuesFieldListFilter),
+        'is_current',
+        ('version_name', CachedValuesFieldListFilter),
+    )
     search_fields = ('version_number', 'is_current',)
+
+
+@admin.register(ForbiddenWord)
+class ForbiddenWordAdmin(admin.ModelAdmin):
+    list_display = ("id", "word")
+    search_fields = ("word",)
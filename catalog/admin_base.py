@@ -0,0 +1,115 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import ForeignKey, OneToOneField
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Planner estimate of the number of rows on PostgreSQL, None elsewhere.
+
+    Without filters it is pg_class.reltuples of the table, otherwise the row estimate of
+    the query plan; both are read without scanning the table.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # reltuples = -1, пока таблицу ни разу не анализировали
+            return row[0] if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner estimate as the count once it exceeds ADMIN_ESTIMATED_COUNT_THRESHOLD;
+    smaller tables and other databases get the exact COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+
+class CachedValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """
+    AllValuesFieldListFilter whose SELECT DISTINCT is cached for ADMIN_FILTER_CACHE_TIMEOUT seconds.
+
+    At most max_values values are listed; when there are more, the filter says so and
+    offers a text field for an exact value instead of silently dropping the rest.
+    """
+
+    max_values = 200
+    template = "admin/catalog/cached_values_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        try:
+            values = self.cached_values()
+        except EmptyResultSet:
+            values = []
+        self.truncated = len(values) > self.max_values
+        self.lookup_choices = values[: self.max_values]
+        self.hidden_params = []
+
+    def cached_values(self):
+        # Ключ зависит от текста запроса: get_queryset() админки и limit_choices_to дают разные значения
+        query = str(self.lookup_choices.query).encode()
+        cache_key = f"admin:values:{self.field_path}:{hashlib.md5(query).hexdigest()}"
+        values = cache.get(cache_key)
+        if values is None:
+            # Лишнее значение показывает, что список обрезан
+            values = list(self.lookup_choices[: self.max_values + 1])
+            cache.set(cache_key, values, timeout=settings.ADMIN_FILTER_CACHE_TIMEOUT)
+        return values
+
+    def choices(self, changelist):
+        # Остальные параметры списка сохраняются в форме ввода значения скрытыми полями
+        expected = self.expected_parameters()
+        self.hidden_params = [(key, value) for key, value in changelist.params.items() if key not in expected]
+        return super().choices(changelist)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist for big tables: estimated page count, one COUNT per page and related
+    objects of list_display joined into the page query.
+    """
+
+    paginator = EstimatedCountPaginator
+    # Без этого отфильтрованный список считает ещё и полное количество строк
+    show_full_result_count = False
+
+    def get_list_select_related(self, request):
+        if self.list_select_related:
+            return self.list_select_related
+        related = []
+        for name in self.get_list_display(request):
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if isinstance(field, (ForeignKey, OneToOneField)):
+                related.append(name)
+        return related
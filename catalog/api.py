@@ -0,0 +1,181 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.views import View
+
+from catalog.models import Category, Product, Version
+from catalog.pagination import KeysetPaginationMixin
+
+
+class ApiError(Exception):
+    pass
+
+
+class ReadOnlyApiView(KeysetPaginationMixin, View):
+    """
+    Read-only JSON endpoint: a cursor-paginated list, or one object when the URL has a pk.
+
+    Only the requested columns are selected (?fields=id,product_name,price) and rows are
+    serialized straight from values_list, without creating model instances. Decimals are
+    encoded as strings and dates in ISO 8601 by DjangoJSONEncoder.
+    """
+
+    model = None
+    use_read_replica = True
+    # Поля API: имя в ответе -> путь для values_list
+    api_fields = {}
+    # Преобразования значений из базы перед выдачей: имя в ответе -> функция
+    api_converters = {}
+    default_fields = None
+    # Параметры запроса, по которым можно фильтровать список: имя -> поле
+    filter_fields = {}
+    keyset_ordering = ("pk",)
+    page_size = 100
+    max_page_size = 500
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = self.get_fields()
+            queryset = self.get_queryset()
+            if "pk" in kwargs:
+                data = self.get_object_data(queryset, fields, kwargs["pk"])
+            else:
+                data = self.get_list_data(queryset, fields)
+        except ApiError as e:
+            return self.render_json({"error": str(e)}, status=400)
+        except Http404 as e:
+            return self.render_json({"error": str(e) or "Не найдено"}, status=404)
+        return self.render_json(data)
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_fields(self):
+        raw = self.request.GET.get("fields")
+        if not raw:
+            return list(self.default_fields or self.api_fields)
+        fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+        unknown = [name for name in fields if name not in self.api_fields]
+        if unknown or not fields:
+            raise ApiError(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(self.api_fields)}")
+        return fields
+
+    def get_page_size(self):
+        raw = self.request.GET.get("limit")
+        if raw is None:
+            return self.page_size
+        if not raw.isdigit() or not 0 < int(raw) <= self.max_page_size:
+            raise ApiError(f"limit должен быть от 1 до {self.max_page_size}")
+        return int(raw)
+
+    def filter_queryset(self, queryset):
+        for param, field in self.filter_fields.items():
+            value = self.request.GET.get(param)
+            if value is not None:
+                if not value.isdigit():
+                    raise ApiError(f"{param} должен быть числом")
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    def get_object_data(self, queryset, fields, pk):
+        row = queryset.filter(pk=pk).values_list(*(self.api_fields[name] for name in fields)).first()
+        if row is None:
+            raise Http404
+        return self.serialize_row(fields, row)
+
+    def get_list_data(self, queryset, fields):
+        # Ключи курсора идут первыми колонками, даже если клиент их не запросил
+        key_names = [name for name, _, _ in self._get_keys(queryset.model)]
+        queryset = self.filter_queryset(queryset).values_list(
+            *key_names, *(self.api_fields[name] for name in fields)
+        )
+        _, page, rows, _ = self.paginate_queryset(queryset, self.get_page_size())
+        offset = len(key_names)
+        return {
+            "results": [self.serialize_row(fields, row[offset:]) for row in rows],
+            "next": self.get_page_link(page.next_cursor),
+            "previous": self.get_page_link(page.previous_cursor),
+        }
+
+    def serialize_row(self, fields, values):
+        data = dict(zip(fields, values))
+        for name, convert in self.api_converters.items():
+            if name in data:
+                data[name] = convert(data[name])
+        return data
+
+    def get_cursor_values(self, row, keys):
+        return list(row[: len(keys)])
+
+    def get_page_link(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[self.cursor_kwarg] = cursor
+        return f"{self.request.path}?{params.urlencode()}"
+
+    @staticmethod
+    def render_json(data, status=200):
+        return JsonResponse(
+            data,
+            status=status,
+            encoder=DjangoJSONEncoder,
+            json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+        )
+
+
+def image_url(name):
+    """
+    Public URL of a stored product image, like product.image.url.
+    """
+    return Product._meta.get_field("image").storage.url(name) if name else None
+
+
+class ProductApiView(ReadOnlyApiView):
+    model = Product
+    api_fields = {
+        "id": "id",
+        "product_name": "product_name",
+        "product_description": "product_description",
+        "price": "price",
+        "category": "category_id",
+        "category_name": "category__category_name",
+        "image": "image",
+        "views_counter": "views_counter",
+        "current_version": "current_version_id",
+        "current_version_name": "current_version__version_name",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
+    # В базе хранится имя файла в хранилище, клиенту нужен его адрес
+    api_converters = {"image": image_url}
+    default_fields = ("id", "product_name", "price", "category", "current_version", "updated_at")
+    filter_fields = {"category": "category_id"}
+
+    def get_queryset(self):
+        # Наружу отдаём только опубликованные продукты
+        return Product.objects.filter(is_published=True)
+
+
+class CategoryApiView(ReadOnlyApiView):
+    model = Category
+    api_fields = {
+        "id": "id",
+        "category_name": "category_name",
+        "category_description": "category_description",
+        "published_count": "published_count",
+    }
+
+
+class VersionApiView(ReadOnlyApiView):
+    model = Version
+    api_fields = {
+        "id": "id",
+        "product": "product_id",
+        "version_number": "version_number",
+        "version_name": "version_name",
+        "is_current": "is_current",
+    }
+    filter_fields = {"product": "product_id"}
+
+    def get_queryset(self):
+        return Version.objects.filter(product__is_published=True)
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CatalogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "catalog"
+
+    def ready(self):
+        # Регистрирует сигналы: сброс кэшей запрещённых слов и прав, построение вариантов изображений,
+        # учёт SQL-запросов в соединениях всех потоков, регистронезависимый поиск на SQLite,
+        # сброс счётчиков просмотров после запросов
+        import catalog.counters  # noqa: F401
+        import catalog.instrumentation  # noqa: F401
+        import catalog.moderation  # noqa: F401
+        import catalog.permissions  # noqa: F401
+        import catalog.search  # noqa: F401
+        import catalog.signals  # noqa: F401
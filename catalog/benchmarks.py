@@ -0,0 +1,242 @@
+import asyncio
+import importlib
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+
+from blog.models import Blog
+from blog.utils import base_slug
+from catalog.models import Category, CategoryPriceStats, Product, Version
+from users.models import User
+
+BENCHMARK_PASSWORD = "Benchmark-Password-1"
+
+
+def seed(products=1000, versions_per_product=3, blog_posts=200, users=200):
+    """
+    Fill an empty database with a catalog of the given size and return the login user.
+    """
+    categories = Category.objects.bulk_create(
+        Category(category_name=f"Категория {index}", category_description="Описание категории")
+        for index in range(max(products // 100, 1))
+    )
+    Product.objects.bulk_create(
+        (
+            Product(
+                product_name=f"Продукт {index:06}",
+                product_description="Описание продукта " * 10,
+                price=100 + index,
+                category=categories[index % len(categories)],
+                is_published=index % 2 == 0,
+            )
+            for index in range(products)
+        ),
+        batch_size=1000,
+    )
+    Category.objects.recount()
+    CategoryPriceStats.objects.rebuild()
+    names = [f"{number}.0" for number in range(1, versions_per_product + 1)]
+    for product in Product.objects.order_by("pk")[: min(products, 500)]:
+        Version.objects.bulk_create_versions(product, names)
+
+    Blog.objects.bulk_create(
+        (
+            # bulk_create минует Blog.save, поэтому slug задаём сразу
+            Blog(title=f"Статья {index}", slug=base_slug(f"Статья {index}"), body="Текст статьи " * 50)
+            for index in range(blog_posts)
+        ),
+        batch_size=1000,
+    )
+    User.objects.bulk_create(
+        (User(email=f"user{index}@example.com", is_active=True) for index in range(users)),
+        batch_size=1000,
+    )
+    user = User.objects.create(email="benchmark@example.com", is_active=True)
+    user.set_password(BENCHMARK_PASSWORD)
+    user.save()
+    return user
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def check(response, iteration):
+    if response.status_code >= 400:
+        raise RuntimeError(f"Ответ {response.status_code} на итерации {iteration}")
+
+
+def measure(request, iterations, warmup=3, memory_iterations=5):
+    """
+    Call request(iteration) and collect latency percentiles, queries per call and peak memory.
+
+    Queries are counted on every database alias, so reads sent to a replica are included.
+    Peak memory is measured in a separate pass: tracemalloc slows every allocation down and
+    would inflate the timings.
+    """
+    for iteration in range(warmup):
+        request(-iteration - 1)
+
+    timings = []
+    queries = []
+    for iteration in range(iterations):
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            started = time.perf_counter()
+            response = request(iteration)
+            timings.append(time.perf_counter() - started)
+        check(response, iteration)
+        queries.append(sum(len(context) for context in captured))
+
+    tracemalloc.start()
+    try:
+        # Номера итераций продолжаются: сценарии с записью создают уникальные объекты
+        for iteration in range(iterations, iterations + memory_iterations):
+            check(request(iteration), iteration)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "queries": statistics.median(queries),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def scenarios(user):
+    """
+    Named request callables for the hot pages, each one taking the iteration number.
+    """
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(user)
+    product = Product.objects.order_by("pk").first()
+    blog_post = Blog.objects.order_by("pk").first()
+    category = Category.objects.order_by("pk").first()
+
+    def product_create(iteration):
+        return logged_in.post(
+            reverse("catalog:product_create"),
+            {
+                "product_name": f"Новый продукт {iteration}",
+                "product_description": "Обычное описание нового продукта " * 10,
+                "price": "199.99",
+                "category": category.pk,
+            },
+        )
+
+    def login(iteration):
+        return Client().post(
+            reverse("users:login"), {"username": user.email, "password": BENCHMARK_PASSWORD}
+        )
+
+    def register(iteration):
+        return Client().post(
+            reverse("users:register"),
+            {
+                "email": f"new{iteration}@example.com",
+                "password1": BENCHMARK_PASSWORD,
+                "password2": BENCHMARK_PASSWORD,
+            },
+        )
+
+    return {
+        "product_list": lambda iteration: anonymous.get(reverse("catalog:product_list")),
+        "product_detail": lambda iteration: anonymous.get(reverse("catalog:product_details", args=[product.pk])),
+        "product_create": product_create,
+        "blog_list": lambda iteration: anonymous.get(reverse("blog:list")),
+        "blog_detail": lambda iteration: anonymous.get(reverse("blog:view", args=[blog_post.slug])),
+        "api_product_list": lambda iteration: anonymous.get(reverse("catalog:api_product_list"), {"limit": 100}),
+        "login": login,
+        "register": register,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return human-readable regressions of results against a baseline run.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "peak_memory_kb"):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def use_async_views(enabled):
+    """
+    Switch the hot pages between sync and async views, as ASYNC_VIEWS does at startup.
+    """
+    settings.ASYNC_VIEWS = enabled
+    for module_name in ("catalog.urls", "blog.urls", "config.urls"):
+        importlib.reload(importlib.import_module(module_name))
+    clear_url_caches()
+
+
+def hot_paths():
+    product = Product.objects.filter(is_published=True).order_by("pk").first()
+    blog_post = Blog.objects.filter(is_published=True).order_by("pk").first()
+    return {
+        "product_list": reverse("catalog:product_list"),
+        "product_detail": reverse("catalog:product_details", args=[product.pk]),
+        "blog_list": reverse("blog:list"),
+        "blog_detail": reverse("blog:view", args=[blog_post.slug]),
+    }
+
+
+def wsgi_throughput(path, requests, concurrency):
+    """
+    Requests per second through the WSGI handler with concurrency worker threads.
+    """
+    per_worker = requests // concurrency
+
+    def worker(_):
+        client = Client()
+        try:
+            for _ in range(per_worker):
+                if client.get(path).status_code >= 400:
+                    raise RuntimeError(f"Ошибка на {path}")
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    return round(per_worker * concurrency / (time.perf_counter() - started), 1)
+
+
+def asgi_throughput(path, requests, concurrency):
+    """
+    Requests per second through the ASGI handler with concurrency requests in flight.
+    """
+    per_worker = requests // concurrency
+
+    async def worker():
+        client = AsyncClient()
+        for _ in range(per_worker):
+            if (await client.get(path)).status_code >= 400:
+                raise RuntimeError(f"Ошибка на {path}")
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    return round(per_worker * concurrency / (time.perf_counter() - started), 1)
@@ -0,0 +1,194 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+# Модели со счётчиками просмотров и поле, в которое сбрасываются накопленные приращения
+COUNTER_FIELDS = {
+    "catalog.product": "views_counter",
+    "blog.blog": "views_count",
+}
+
+
+class LocalCounterBuffer:
+    """
+    In-process buffer of view increments, used when the shared cache is disabled.
+
+    Only the owning process can flush it: the first request to finish after the buffer
+    became older than VIEW_COUNTERS_FLUSH_INTERVAL writes it. Views of the last interval
+    are lost when the worker exits; the flush_view_counters command cannot reach them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._last_flush = time.monotonic()
+
+    def incr(self, label, pk, amount=1):
+        with self._lock:
+            self._counts[(label, pk)] += amount
+
+    def is_due(self, interval):
+        return time.monotonic() - self._last_flush >= interval
+
+    def has_pending(self):
+        return bool(self._counts)
+
+    async def aincr(self, label, pk, amount=1):
+        # Счётчик в памяти процесса: блокировка держится микросекунды, поток не нужен
+        self.incr(label, pk, amount)
+
+    async def ais_due(self, interval):
+        return self.is_due(interval)
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+            self._last_flush = time.monotonic()
+        return dict(counts)
+
+
+class RedisCounterBuffer:
+    """
+    View increments collected in a Redis hash, shared by all worker processes.
+    """
+
+    key = "view_counters"
+    lock_key = "view_counters:flush_lock"
+
+    def _client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def incr(self, label, pk, amount=1):
+        self._client().hincrby(self.key, f"{label}:{pk}", amount)
+
+    def is_due(self, interval):
+        if interval <= 0:
+            return True
+        # Сбрасывает тот процесс, который первым поставил блокировку на интервал
+        return cache.add(self.lock_key, 1, timeout=interval)
+
+    async def aincr(self, label, pk, amount=1):
+        # Запрос к Redis не трогает ORM, поэтому его можно выполнить вне общего sync-потока
+        await sync_to_async(self.incr, thread_sensitive=False)(label, pk, amount)
+
+    async def ais_due(self, interval):
+        if interval <= 0:
+            return True
+        return await cache.aadd(self.lock_key, 1, timeout=interval)
+
+    def drain(self):
+        from redis.exceptions import ResponseError
+
+        client = self._client()
+        flushing_key = f"{self.key}:flushing:{uuid.uuid4().hex}"
+        try:
+            # RENAME атомарен: новые просмотры уже попадают в свежий хэш
+            client.rename(self.key, flushing_key)
+        except ResponseError:
+            return {}
+        data = client.hgetall(flushing_key)
+        client.delete(flushing_key)
+
+        counts = {}
+        for field, amount in data.items():
+            label, pk = field.decode().rsplit(":", 1)
+            counts[(label, int(pk))] = int(amount)
+        return counts
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = RedisCounterBuffer() if settings.CACHES_ENABLE else LocalCounterBuffer()
+    return _buffer
+
+
+def record_view(obj):
+    """
+    Count a view of obj without writing to the database on every request.
+    """
+    buffer = get_buffer()
+    buffer.incr(obj._meta.label_lower, obj.pk)
+    if buffer.is_due(settings.VIEW_COUNTERS_FLUSH_INTERVAL):
+        flush_view_counters()
+
+
+async def arecord_view(obj):
+    """
+    record_view() for async views.
+    """
+    buffer = get_buffer()
+    await buffer.aincr(obj._meta.label_lower, obj.pk)
+    if await buffer.ais_due(settings.VIEW_COUNTERS_FLUSH_INTERVAL):
+        await sync_to_async(flush_view_counters)()
+
+
+def flush_view_counters():
+    """
+    Write buffered increments with one UPDATE ... SET field = field + n per model and n.
+    Returns the number of updated rows.
+    """
+    buffer = get_buffer()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+
+    groups = defaultdict(list)
+    for (label, pk), amount in counts.items():
+        groups[(label, amount)].append(pk)
+
+    updated = 0
+    try:
+        with transaction.atomic():
+            for (label, amount), pks in groups.items():
+                model = apps.get_model(label)
+                field = COUNTER_FIELDS[label]
+                updated += model.objects.filter(pk__in=pks).update(**{field: F(field) + amount})
+    except Exception:
+        # Возвращаем приращения в буфер, чтобы они ушли при следующем сбросе
+        for (label, pk), amount in counts.items():
+            buffer.incr(label, pk, amount)
+        raise
+    return updated
+
+
+@receiver(request_finished)
+def flush_due_counters(**kwargs):
+    """
+    Flush the in-process buffer after any request once it is due, not only after a view.
+    """
+    # Redis-буфер проверяется только при просмотре: лишний запрос к Redis на каждый ответ не нужен
+    buffer = _buffer
+    if (
+        isinstance(buffer, LocalCounterBuffer)
+        and buffer.has_pending()
+        and buffer.is_due(settings.VIEW_COUNTERS_FLUSH_INTERVAL)
+    ):
+        flush_view_counters()
+
+
+def discard_view_counters():
+    """
+    Drop buffered increments without writing them; the test runner calls it before the
+    test database is destroyed, so test views never reach the real database.
+    """
+    if _buffer is not None:
+        _buffer.drain()
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import BooleanField
 from catalog.models import Product, Version
+from catalog.moderation import get_matcher
 
 
 class StyleFormMixin:
@@ -20,28 +21,18 @@ class ProductForm(StyleFormMixin, forms.ModelForm):
         exclude = ("views_counter", "owner")
 
     def clean_product_name(self):
-        clean_data = self.cleaned_data.get('product_name', '')
-
-        words = ['казино', 'криптовалюта', 'крипта', 'биржа', 'дешево', 'бесплатно', 'обман', 'полиция', 'радар']
-
-        for word in words:
-            if word in clean_data.lower():
-                raise forms.ValidationError(
-                    'Вы не можете использовать запрещенные слова в названии продукта или описании продукта'
-                )
-
-        return clean_data
+        return self._check_forbidden_words('product_name')
 
     def clean_product_description(self):
-        clean_data = self.cleaned_data.get('product_description', '')
+        return self._check_forbidden_words('product_description')
 
-        words = ['казино', 'криптовалюта', 'крипта', 'биржа', 'дешево', 'бесплатно', 'обман', 'полиция', 'радар']
+    def _check_forbidden_words(self, field_name):
+        clean_data = self.cleaned_data.get(field_name, '')
 
-        for word in words:
-            if word in clean_data.lower():
-                raise forms.ValidationError(
-                    'Вы не можете использовать запрещенные слова в названии продукта или описании продукта'
-                )
+        if get_matcher().find(clean_data):
+            raise forms.ValidationError(
+                'Вы не можете использовать запрещенные слова в названии продукта или описании продукта'
+            )
 
         return clean_data
 
@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Ширины (в пикселях) WebP-вариантов для каждого места вывода: 1x и 2x для плотных экранов
+VARIANTS = {
+    "card": (400, 800),
+    "detail": (800, 1600),
+    "avatar": (150, 300),
+}
+
+# Поля с изображениями и варианты, которые для них строятся
+IMAGE_FIELDS = {
+    "catalog.product": ("image", ("card", "detail")),
+    "blog.blog": ("image", ("card", "detail")),
+    "users.user": ("avatar", ("avatar",)),
+}
+
+# Готовность вариантов отмечается в кэше при их построении; если отметки нет (другой процесс
+# без общего кэша, команда), файл проверяется один раз, отрицательный ответ живёт недолго
+READY_CACHE_KEY = "image_variants:{digest}:{variant}"
+MISSING_TIMEOUT = 60
+
+_NOT_LOADED = object()
+
+_executor = None
+
+
+def variant_name(name, variant, width):
+    """
+    Path of a variant stored next to the original: products/a.jpg -> products/a.card-400.webp
+    """
+    root, _ = posixpath.splitext(name)
+    return f"{root}.{variant}-{width}.webp"
+
+
+def _ready_key(name, variant):
+    return READY_CACHE_KEY.format(digest=hashlib.md5(name.encode()).hexdigest(), variant=variant)
+
+
+def variants_ready(name, variant):
+    """
+    Whether the variant of the image is built; a cache lookup, not a filesystem check.
+    """
+    key = _ready_key(name, variant)
+    ready = cache.get(key)
+    if ready is None:
+        ready = default_storage.exists(variant_name(name, variant, VARIANTS[variant][0]))
+        cache.set(key, ready, timeout=None if ready else MISSING_TIMEOUT)
+    return ready
+
+
+def mark_ready(name, variants, ready=True):
+    timeout = None if ready else MISSING_TIMEOUT
+    cache.set_many({_ready_key(name, variant): ready for variant in variants}, timeout=timeout)
+
+
+def generate_variants(name, variants, storage=default_storage, force=False):
+    """
+    Create missing WebP variants of the image and return the number of written files.
+    """
+    targets = [
+        (variant_name(name, variant, width), width)
+        for variant in variants
+        for width in VARIANTS[variant]
+        if force or not storage.exists(variant_name(name, variant, width))
+    ]
+    if not targets:
+        mark_ready(name, variants)
+        return 0
+
+    with storage.open(name, "rb") as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    written = 0
+    for target, width in targets:
+        # Не увеличиваем маленькие изображения: вариант получает размер оригинала
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        content = ContentFile(b"")
+        resized.save(content, "WEBP", quality=settings.IMAGE_VARIANTS_QUALITY, method=4)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, content)
+        written += 1
+    mark_ready(name, variants)
+    return written
+
+
+def delete_variants(name, variants, storage=default_storage):
+    """
+    Remove the variants of an image that is no longer used.
+    """
+    mark_ready(name, variants, ready=False)
+    for variant in variants:
+        for width in VARIANTS[variant]:
+            target = variant_name(name, variant, width)
+            if storage.exists(target):
+                storage.delete(target)
+
+
+def _replace_in_background(old_name, new_name, variants):
+    try:
+        if old_name:
+            delete_variants(old_name, variants)
+        if new_name:
+            generate_variants(new_name, variants)
+    except Exception:
+        logger.exception("Не удалось обновить варианты изображения %s", new_name or old_name)
+
+
+def schedule_variants(new_name, variants, old_name=None):
+    """
+    Build variants of new_name and delete the ones of old_name on the worker pool once the
+    current transaction is committed.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANTS_WORKERS, thread_name_prefix="image-variants"
+        )
+    transaction.on_commit(lambda: _executor.submit(_replace_in_background, old_name, new_name, variants))
+
+
+def _stored_name(instance, attname):
+    # Значение берётся из __dict__: обращение к отложенному (defer/only) полю сделало бы запрос
+    value = instance.__dict__.get(attname, _NOT_LOADED)
+    if value is _NOT_LOADED:
+        return value
+    return getattr(value, "name", value) or ""
+
+
+def remember_image(instance):
+    """
+    Keep the image name the instance was loaded with, to notice when it changes.
+    """
+    field_name, _ = IMAGE_FIELDS[instance._meta.label_lower]
+    instance._variants_source = _stored_name(instance, field_name)
+
+
+def schedule_for_instance(instance, created=False, update_fields=None):
+    """
+    Rebuild variants after a save only if the image itself changed; no filesystem access.
+    """
+    field_name, variants = IMAGE_FIELDS[instance._meta.label_lower]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    old_name = "" if created else getattr(instance, "_variants_source", _NOT_LOADED)
+    new_name = _stored_name(instance, field_name)
+    if new_name is _NOT_LOADED or new_name == old_name:
+        return
+    instance._variants_source = new_name
+    schedule_variants(new_name, variants, old_name=None if old_name is _NOT_LOADED else old_name)
+
+
+def srcset(name, variant):
+    """
+    Return (src, srcset) for the variant, or None if the variants are not built yet.
+    """
+    widths = VARIANTS[variant]
+    if not variants_ready(name, variant):
+        return None
+    urls = [(default_storage.url(variant_name(name, variant, width)), width) for width in widths]
+    return urls[0][0], ", ".join(f"{url} {width}w" for url, width in urls)
@@ -0,0 +1,190 @@
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """
+    Timings of one sampled request, collected by the middleware and the instrumented cache.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Вызывается через connection.execute_wrapper для каждого SQL-запроса
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def instrument_connection(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Соединения у каждого потока свои, а под ASGI ORM работает в sync-потоках, а не в потоке
+# middleware. Поэтому обёртка ставится на соединения того потока, где они открываются,
+# и находит статистику запроса через ContextVar, которая копируется в sync_to_async.
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument_connection(connection)
+
+
+@receiver(request_started)
+def instrument_thread_connections(**kwargs):
+    # Соединения, открытые до загрузки этого модуля
+    for connection in connections.all(initialized_only=True):
+        instrument_connection(connection)
+
+
+def record_cache_lookup(hits, misses):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+class InstrumentedCacheMixin:
+    """
+    Counts cache hits and misses of the current request.
+    """
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        record_cache_lookup(len(values), len(keys) - len(values))
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measures SQL, template rendering and cache usage of a sample of requests and reports
+    them in the Server-Timing header and in one structured log line per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Под ASGI цепочка остаётся асинхронной и не переключается в sync-поток ради этого middleware
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.report(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.report(request, response, stats, time.perf_counter() - started)
+
+    @staticmethod
+    def report(request, response, stats, total_time):
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_queries} queries"',
+                f"render;dur={stats.render_time * 1000:.1f}",
+                f'cache;desc="hits={stats.cache_hits} misses={stats.cache_misses}"',
+                f"total;dur={total_time * 1000:.1f}",
+            )
+        )
+        match = request.resolver_match
+        logger.info(
+            json.dumps(
+                {
+                    "url_name": match.view_name if match else None,
+                    "method": request.method,
+                    "status": response.status_code,
+                    "total_ms": round(total_time * 1000, 1),
+                    "db_ms": round(stats.db_time * 1000, 1),
+                    "db_queries": stats.db_queries,
+                    "render_ms": round(stats.render_time * 1000, 1),
+                    "cache_hits": stats.cache_hits,
+                    "cache_misses": stats.cache_misses,
+                }
+            )
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        stats = _current_stats.get()
+        if stats is None:
+            return response
+
+        render = response.render
+
+        def timed_render():
+            # Шаблон рендерится после этого хука, поэтому замеряем сам вызов render()
+            started = time.perf_counter()
+            try:
+                return render()
+            finally:
+                stats.render_time += time.perf_counter() - started
+
+        response.render = timed_render
+        return response
@@ -0,0 +1,240 @@
+import heapq
+import json
+import threading
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from catalog.counters import flush_view_counters
+from catalog.models import Product
+
+PopularProduct = namedtuple("PopularProduct", ["pk", "name", "price", "category_id", "views"])
+
+OVERALL_BOARD = "all"
+
+# Доски хранят больше позиций, чем показывается: товары у границы не вытесняются каждым просмотром
+CAPACITY_FACTOR = 2
+
+
+def board_name(category_id=None):
+    return OVERALL_BOARD if category_id is None else f"category:{category_id}"
+
+
+def capacity():
+    return settings.LEADERBOARD_SIZE * CAPACITY_FACTOR
+
+
+class LocalLeaderboard:
+    """
+    Per-process boards of at most capacity() products each, used when the shared cache is disabled.
+
+    They are filled by the views this process serves: a product enters with its views_counter
+    from the database. The reconcile_leaderboard command cannot reach them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = defaultdict(dict)
+        self._items = {}
+        self._generation = 0
+
+    def record(self, item, views, boards):
+        with self._lock:
+            self._items[item.pk] = item
+            for name in boards:
+                scores = self._boards[name]
+                scores[item.pk] = scores.get(item.pk, views) + 1
+                if len(scores) > capacity():
+                    evicted = min(scores, key=scores.get)
+                    del scores[evicted]
+                    if not any(evicted in board for board in self._boards.values()):
+                        self._items.pop(evicted, None)
+
+    def top(self, name, limit):
+        with self._lock:
+            scores = self._boards.get(name, {})
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return [self._items[pk]._replace(views=views) for pk, views in best]
+
+    def discard(self, pk, boards):
+        with self._lock:
+            for name in boards:
+                self._boards.get(name, {}).pop(pk, None)
+
+    def replace(self, boards, items):
+        with self._lock:
+            self._boards = defaultdict(dict, boards)
+            self._items = items
+            self._generation += 1
+
+    def generation(self):
+        return self._generation
+
+
+class RedisLeaderboard:
+    """
+    Boards kept in Redis sorted sets (product pk -> views), shared by all worker processes.
+    Product names and prices are kept in a hash, so reading a board needs no database query.
+    """
+
+    prefix = "leaderboard"
+    items_key = "leaderboard:items"
+    keys_key = "leaderboard:keys"
+    generation_key = "leaderboard:generation"
+
+    def _client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    @staticmethod
+    def _dump(item):
+        return json.dumps([item.name, str(item.price), item.category_id])
+
+    def record(self, item, views, boards):
+        # Один round trip: ZADD NX ставит товару счёт из базы, ZINCRBY добавляет просмотр
+        pipe = self._client().pipeline(transaction=False)
+        pipe.hset(self.items_key, item.pk, self._dump(item))
+        for name in boards:
+            key = self._key(name)
+            pipe.zadd(key, {item.pk: views}, nx=True)
+            pipe.zincrby(key, 1, item.pk)
+            pipe.zremrangebyrank(key, 0, -capacity() - 1)
+            pipe.sadd(self.keys_key, key)
+        pipe.execute()
+
+    def top(self, name, limit):
+        client = self._client()
+        scores = client.zrevrange(self._key(name), 0, limit - 1, withscores=True)
+        if not scores:
+            return []
+        items = client.hmget(self.items_key, [pk for pk, _ in scores])
+        top = []
+        for (pk, views), item in zip(scores, items):
+            # Описание могло пропасть между ZREVRANGE и HMGET: позицию вернёт ближайшая сверка
+            if item is not None:
+                name, price, category_id = json.loads(item)
+                top.append(PopularProduct(int(pk), name, Decimal(price), category_id, int(views)))
+        return top
+
+    def discard(self, pk, boards):
+        pipe = self._client().pipeline(transaction=False)
+        for name in boards:
+            pipe.zrem(self._key(name), pk)
+        pipe.execute()
+
+    def replace(self, boards, items):
+        client = self._client()
+        old_keys = client.smembers(self.keys_key)
+        pipe = client.pipeline()
+        pipe.delete(self.items_key, self.keys_key, *old_keys)
+        if items:
+            pipe.hset(self.items_key, mapping={pk: self._dump(item) for pk, item in items.items()})
+        for name, scores in boards.items():
+            # ZADD без элементов - ошибка Redis; пустая доска просто не создаётся
+            if scores:
+                pipe.zadd(self._key(name), scores)
+                pipe.sadd(self.keys_key, self._key(name))
+        pipe.incr(self.generation_key)
+        pipe.execute()
+
+    def generation(self):
+        return int(self._client().get(self.generation_key) or 0)
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = RedisLeaderboard() if settings.CACHES_ENABLE else LocalLeaderboard()
+    return _leaderboard
+
+
+def _item(product):
+    return PopularProduct(product.pk, product.product_name, product.price, product.category_id, None)
+
+
+def record_product_view(product):
+    """
+    Add a view of a published product to the overall board and the board of its category.
+
+    A product outside a board enters it with views_counter, which lags behind the buffered
+    views by at most VIEW_COUNTERS_FLUSH_INTERVAL seconds.
+    """
+    if product.is_published:
+        boards = (OVERALL_BOARD, board_name(product.category_id))
+        get_leaderboard().record(_item(product), product.views_counter, boards)
+
+
+async def arecord_product_view(product):
+    if not product.is_published:
+        return
+    if settings.CACHES_ENABLE:
+        await sync_to_async(record_product_view, thread_sensitive=False)(product)
+    else:
+        record_product_view(product)
+
+
+def discard_product(pk, category_id):
+    """
+    Remove a deleted, unpublished or moved product from the boards it was shown on.
+    """
+    get_leaderboard().discard(pk, (OVERALL_BOARD, board_name(category_id)))
+
+
+def reconcile():
+    """
+    Rebuild all boards from Product.views_counter with one query: the top products of every
+    category by views, the overall board is the best of them. Returns the number of products.
+    """
+    # Накопленные просмотры сначала попадают в базу, иначе сверка откатила бы их
+    flush_view_counters()
+    rank = Window(RowNumber(), partition_by=[F("category_id")], order_by=[F("views_counter").desc(), F("pk")])
+    rows = (
+        Product.objects.filter(is_published=True, views_counter__gt=0)
+        .annotate(rank=rank)
+        .filter(rank__lte=capacity())
+        .values_list("pk", "product_name", "price", "category_id", "views_counter")
+    )
+    rows = [PopularProduct(*row) for row in rows]
+    items, boards = {}, defaultdict(dict)
+    for item in rows:
+        items[item.pk] = item._replace(views=None)
+        boards[board_name(item.category_id)][item.pk] = item.views
+    overall = heapq.nlargest(capacity(), rows, key=attrgetter("views"))
+    boards[OVERALL_BOARD] = {item.pk: item.views for item in overall}
+    get_leaderboard().replace(dict(boards), items)
+    return len(items)
+
+
+def get_popular_products(category_id=None, limit=None):
+    """
+    Most viewed published products, overall or of one category, without a query to Product.
+    """
+    return get_leaderboard().top(board_name(category_id), limit or settings.LEADERBOARD_SIZE)
+
+
+def leaderboard_generation():
+    """
+    Changes with every reconciliation; part of the ETag of pages showing a board.
+    """
+    return get_leaderboard().generation()
+
+
+async def aleaderboard_generation():
+    if settings.CACHES_ENABLE:
+        return await sync_to_async(leaderboard_generation, thread_sensitive=False)()
+    return leaderboard_generation()
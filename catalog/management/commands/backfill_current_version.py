@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from catalog.models import Product, Version
+
+
+class Command(BaseCommand):
+    help = "Заполняет Product.current_version по текущим версиям продуктов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Количество продуктов, обновляемых одним запросом",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        current_version = Subquery(
+            Version.objects.filter(product=OuterRef("pk"), is_current=True)
+            .order_by("-version_number")
+            .values("pk")[:1]
+        )
+
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Product.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Product.objects.filter(pk__in=pks).update(
+                    current_version=current_version
+                )
+            last_pk = pks[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлено продуктов: {updated}")
+        )
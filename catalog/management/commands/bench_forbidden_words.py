@@ -0,0 +1,43 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from catalog.moderation import ForbiddenWordsMatcher
+
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщыэюя"
+
+
+class Command(BaseCommand):
+    help = "Замеряет стоимость проверки описания на запрещённые слова"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--words", type=int, default=5000, help="Размер списка запрещённых слов")
+        parser.add_argument("--length", type=int, default=500, help="Длина проверяемого описания")
+        parser.add_argument("--calls", type=int, default=2000, help="Количество проверок")
+
+    @staticmethod
+    def _random_word(rng):
+        return "".join(rng.choices(ALPHABET, k=rng.randint(5, 12)))
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        words = [self._random_word(rng) for _ in range(options["words"])]
+
+        text = ""
+        while len(text) < options["length"]:
+            text += self._random_word(rng) + " "
+        text = text[: options["length"]]
+
+        build_time = timeit.timeit(lambda: ForbiddenWordsMatcher(words), number=1)
+        matcher = ForbiddenWordsMatcher(words)
+        call_time = timeit.timeit(lambda: matcher.find(text), number=options["calls"]) / options["calls"]
+
+        naive_time = timeit.timeit(
+            lambda: [word for word in words if word in text.lower()], number=options["calls"] // 10 or 1
+        ) / (options["calls"] // 10 or 1)
+
+        self.stdout.write(f"Слов в списке: {len(words)}, длина описания: {len(text)}")
+        self.stdout.write(f"Построение регулярного выражения: {build_time * 1000:.1f} мс")
+        self.stdout.write(f"Проверка описания: {call_time * 1_000_000:.1f} мкс")
+        self.stdout.write(f"Проверка перебором слов: {naive_time * 1_000_000:.1f} мкс")
@@ -0,0 +1,75 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from catalog import benchmarks
+from catalog.counters import flush_view_counters
+
+
+class Command(BaseCommand):
+    help = "Замеряет горячие страницы каталога, блога и пользователей на отдельной тестовой базе"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000, help="Количество продуктов в тестовой базе")
+        parser.add_argument("--iterations", type=int, default=50, help="Замеров на каждый сценарий")
+        parser.add_argument("--only", nargs="*", help="Запустить только указанные сценарии")
+        parser.add_argument("--output", default="bench_output.json", help="Файл для результатов")
+        parser.add_argument("--compare", help="Результаты предыдущего запуска для сравнения")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2, help="Допустимое ухудшение времени и памяти, доля"
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                baseline = json.load(file)["results"]
+
+        # Замеры идут на отдельной базе, как у тестов: рабочие данные не затрагиваются
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = benchmarks.seed(products=options["products"], blog_posts=options["products"] // 5)
+            results = {}
+            for name, request in benchmarks.scenarios(user).items():
+                if options["only"] and name not in options["only"]:
+                    continue
+                results[name] = benchmarks.measure(request, options["iterations"])
+                self.stdout.write(f"{name}: {results[name]}")
+        finally:
+            # Просмотры из буфера нужно записать, пока тестовая база ещё существует
+            flush_view_counters()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump({"meta": self.get_meta(options), "results": results}, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+        if baseline is not None:
+            regressions = benchmarks.compare(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError("Найдены регрессии:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Регрессий относительно предыдущего запуска нет"))
+
+    @staticmethod
+    def get_meta(options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "products": options["products"],
+            "iterations": options["iterations"],
+        }
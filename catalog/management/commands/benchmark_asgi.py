@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from catalog import benchmarks
+from catalog.counters import flush_view_counters
+
+# Режим -> (async-представления, функция замера)
+MODES = {
+    "wsgi": (False, benchmarks.wsgi_throughput),
+    "asgi_sync_views": (False, benchmarks.asgi_throughput),
+    "asgi_async_views": (True, benchmarks.asgi_throughput),
+}
+
+
+class Command(BaseCommand):
+    help = "Сравнивает пропускную способность горячих страниц под WSGI и ASGI на отдельной тестовой базе"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000, help="Количество продуктов в тестовой базе")
+        parser.add_argument("--requests", type=int, default=400, help="Запросов на каждую страницу и режим")
+        parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+        parser.add_argument("--output", default="bench_asgi_output.json", help="Файл для результатов")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        async_views = benchmarks.settings.ASYNC_VIEWS
+        results = {}
+        try:
+            benchmarks.seed(products=options["products"], blog_posts=options["products"] // 5)
+            # Сброс счётчиков писал бы в базу посреди замера и мешал бы параллельным запросам
+            with override_settings(VIEW_COUNTERS_FLUSH_INTERVAL=3600, REQUEST_INSTRUMENTATION_SAMPLE_RATE=0):
+                for mode, (use_async, throughput) in MODES.items():
+                    benchmarks.use_async_views(use_async)
+                    results[mode] = {
+                        name: throughput(path, options["requests"], options["concurrency"])
+                        for name, path in benchmarks.hot_paths().items()
+                    }
+                    self.stdout.write(f"{mode} (запросов в секунду): {results[mode]}")
+        finally:
+            benchmarks.use_async_views(async_views)
+            flush_view_counters()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options["output"], "w", encoding="utf-8") as file:
+            meta = {
+                "database": connection.vendor,
+                "products": options["products"],
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+            }
+            json.dump({"meta": meta, "results": results}, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
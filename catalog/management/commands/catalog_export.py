@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from catalog.transfer import csv_lines, iter_catalog_records, jsonl_lines
+
+
+class Command(BaseCommand):
+    help = "Потоково выгружает категории, продукты и версии в JSON Lines или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл для выгрузки, '-' для stdout")
+        parser.add_argument("--format", choices=("jsonl", "csv"), help="Формат, по умолчанию по расширению файла")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Строк, читаемых из базы за раз")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        records = iter_catalog_records(options["chunk_size"])
+        lines = csv_lines(records) if file_format == "csv" else jsonl_lines(records)
+
+        stream = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        try:
+            stream.writelines(lines)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+                self.stdout.write(self.style.SUCCESS(f"Каталог выгружен в {path}"))
@@ -0,0 +1,189 @@
+import csv
+import io
+import sys
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from catalog.models import Category, Product, Version
+from catalog.transfer import EXPORT_FIELDS, read_records
+from users.models import User
+
+# Маркер NULL для COPY: в CSV пустая строка и NULL иначе неразличимы
+COPY_NULL = "\\N"
+
+# Порядок загрузки: ссылки на категории и продукты должны разрешаться к моменту вставки
+MODEL_ORDER = ("category", "product", "version")
+
+
+class Command(BaseCommand):
+    help = "Потоково загружает категории, продукты и версии из JSON Lines или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл для загрузки, '-' для stdin")
+        parser.add_argument("--format", choices=("jsonl", "csv"), help="Формат, по умолчанию по расширению файла")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Записей в одной вставке")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        self.batch_size = options["batch_size"]
+        # id категории в файле -> pk в базе
+        self.categories = {}
+        # Существующие категории сопоставляются по названию, только если оно однозначно
+        self.existing_categories = defaultdict(list)
+        for name, pk in Category.objects.values_list("category_name", "pk"):
+            self.existing_categories[name].append(pk)
+        self.matched_categories = {}
+        self.buffers = {model_key: [] for model_key in MODEL_ORDER}
+        self.counts = dict.fromkeys(MODEL_ORDER, 0)
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        try:
+            for line_number, record in enumerate(read_records(stream, file_format), start=1):
+                model_key = record.pop("model", None)
+                if model_key not in self.buffers:
+                    raise CommandError(f"Строка {line_number}: неизвестный тип записи {model_key!r}")
+                # Перед продуктами сохраняем накопленные категории, перед версиями — продукты
+                for previous in MODEL_ORDER[: MODEL_ORDER.index(model_key)]:
+                    self.flush(previous)
+                # В CSV у каждой строки есть колонки всех типов записей: оставляем только свои
+                self.buffers[model_key].append(
+                    {column: record[column] for column in EXPORT_FIELDS[model_key] if column in record}
+                )
+                if len(self.buffers[model_key]) >= self.batch_size:
+                    self.flush(model_key)
+            for model_key in MODEL_ORDER:
+                self.flush(model_key)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.finalize()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Загружено категорий: {category}, продуктов: {product}, версий: {version}".format(**self.counts)
+            )
+        )
+
+    def flush(self, model_key):
+        records = self.buffers[model_key]
+        if not records:
+            return
+        with transaction.atomic():
+            getattr(self, f"insert_{model_key}")(records)
+        self.counts[model_key] += len(records)
+        self.buffers[model_key] = []
+
+    def insert_category(self, records):
+        new = {}
+        for record in records:
+            file_id = category_key(record["id"])
+            name = record["category_name"]
+            if file_id in self.categories or file_id in new:
+                raise CommandError(f"Категория {file_id} встречается в файле дважды")
+            matches = self.existing_categories.get(name, [])
+            if len(matches) > 1:
+                raise CommandError(f"Категория {file_id}: в базе несколько категорий {name!r}")
+            if matches:
+                if matches[0] in self.matched_categories:
+                    raise CommandError(
+                        f"Категории {self.matched_categories[matches[0]]} и {file_id} из файла "
+                        f"совпадают по названию {name!r} с одной категорией в базе"
+                    )
+                self.matched_categories[matches[0]] = file_id
+                self.categories[file_id] = matches[0]
+            else:
+                new[file_id] = Category(category_name=name, category_description=record.get("category_description", ""))
+        # pk новых категорий возвращает сама вставка, повторный поиск по неуникальному названию не нужен
+        Category.objects.bulk_create(new.values())
+        self.categories.update((file_id, category.pk) for file_id, category in new.items())
+
+    def insert_product(self, records):
+        emails = {record["owner"] for record in records if record.get("owner")}
+        owners = dict(User.objects.filter(email__in=emails).values_list("email", "pk"))
+
+        products = []
+        for record in records:
+            category = category_key(record.pop("category"))
+            record.pop("category_name", None)
+            if category not in self.categories:
+                raise CommandError(f"Продукт {record.get('id')}: категория {category} не найдена в файле")
+            owner = record.pop("owner", None)
+            # Даты создания и изменения проставляются заново при загрузке
+            record.pop("created_at", None)
+            record.pop("updated_at", None)
+            product = build_instance(Product, record)
+            product.category_id = self.categories[category]
+            product.owner_id = owners.get(owner)
+            products.append(product)
+        insert(Product, products, with_pk=True)
+
+    def insert_version(self, records):
+        insert(Version, [build_instance(Version, record) for record in records], with_pk=False)
+
+    def finalize(self):
+        # Продукты вставлялись с явными id: сдвигаем последовательность за максимальный id
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Product]):
+                cursor.execute(sql)
+
+        # Денормализованные поля продуктов пересчитываются одним проходом по базе
+        max_number = (
+            Version.objects.filter(product=OuterRef("pk"))
+            .values("product")
+            .annotate(max_number=Max("version_number"))
+            .values("max_number")
+        )
+        Product.objects.update(last_version_number=Coalesce(Subquery(max_number), 0))
+        call_command("backfill_current_version", stdout=self.stdout)
+        call_command("recount_categories", stdout=self.stdout)
+        call_command("rebuild_price_stats", stdout=self.stdout)
+
+
+def category_key(raw):
+    try:
+        return Category._meta.pk.to_python(raw)
+    except ValidationError:
+        raise CommandError(f"Неверный id категории {raw!r}")
+
+
+def build_instance(model, record):
+    values = {}
+    for name, raw in record.items():
+        field = model._meta.get_field(name)
+        if raw == "" and field.null:
+            raw = None
+        values[field.attname] = None if raw is None else field.to_python(raw)
+    return model(**values)
+
+
+def insert(model, objs, with_pk):
+    if connection.vendor != "postgresql":
+        model.objects.bulk_create(objs)
+        return
+
+    fields = [field for field in model._meta.concrete_fields if with_pk or not field.primary_key]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        row = []
+        for field in fields:
+            value = field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+            row.append(COPY_NULL if value is None else value)
+        writer.writerow(row)
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
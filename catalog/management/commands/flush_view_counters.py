@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.counters import flush_view_counters
+
+
+class Command(BaseCommand):
+    help = "Записывает накопленные в Redis счётчики просмотров продуктов и статей в базу (нужен CACHES_ENABLE)"
+
+    def handle(self, *args, **options):
+        if not settings.CACHES_ENABLE:
+            # Без Redis буфер живёт в памяти каждого процесса: отсюда его не видно
+            raise CommandError(
+                "Без CACHES_ENABLE просмотры копятся в памяти рабочих процессов и записываются ими самими "
+                "раз в VIEW_COUNTERS_FLUSH_INTERVAL секунд и при завершении процесса"
+            )
+        updated = flush_view_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлено счётчиков просмотров: {updated}")
+        )
@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from catalog.images import IMAGE_FIELDS, generate_variants
+
+
+class Command(BaseCommand):
+    help = "Строит WebP-варианты для изображений продуктов, статей и аватаров"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Перестроить уже существующие варианты")
+
+    def handle(self, *args, **options):
+        written = 0
+        for label, (field_name, variants) in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            names = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True)
+                .iterator()
+            )
+            for name in names:
+                try:
+                    written += generate_variants(name, variants, force=options["force"])
+                except (OSError, ValueError) as e:
+                    self.stdout.write(self.style.ERROR(f"Ошибка при обработке {name}: {e}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Создано вариантов изображений: {written}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import CategoryPriceStats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает статистику цен по категориям (после bulk-загрузок и массовых update)"
+
+    def handle(self, *args, **options):
+        groups = CategoryPriceStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано групп статистики цен: {groups}"))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.leaderboard import reconcile
+
+
+class Command(BaseCommand):
+    help = "Пересобирает рейтинг популярных продуктов в Redis по счётчикам просмотров в базе (нужен CACHES_ENABLE)"
+
+    def handle(self, *args, **options):
+        if not settings.CACHES_ENABLE:
+            # Без Redis доски живут в памяти каждого процесса: отсюда их не видно
+            raise CommandError(
+                "Без CACHES_ENABLE рейтинг ведёт каждый рабочий процесс в своей памяти по просмотрам, "
+                "которые он обслужил"
+            )
+        products = reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Продуктов в рейтинге: {products}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from catalog.menu import invalidate_menu
+from catalog.models import Category
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает количество продуктов в категориях (после bulk-загрузок и массовых update)"
+
+    def handle(self, *args, **options):
+        updated = Category.objects.recount()
+        invalidate_menu()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано категорий: {updated}"))
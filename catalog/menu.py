@@ -0,0 +1,77 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from catalog.models import Category
+
+VERSION_CACHE_KEY = "category_menu:version"
+
+MenuItem = namedtuple("MenuItem", ["pk", "name", "published_count"])
+
+_lock = threading.Lock()
+# (пункты, дайджест, версия инвалидации, время построения): одна ссылка, чтобы потоки не видели смесь
+_state = None
+
+
+def _is_fresh(state, version):
+    return state is not None and version == state[2] and time.monotonic() - state[3] <= settings.CATEGORY_MENU_TTL
+
+
+def _load_menu(version=None):
+    global _state
+    if version is None:
+        version = cache.get(VERSION_CACHE_KEY, 0)
+    state = _state
+    if not _is_fresh(state, version):
+        with _lock:
+            menu = tuple(
+                MenuItem(*row)
+                for row in Category.objects.filter(published_count__gt=0).values_list(
+                    "pk", "category_name", "published_count"
+                )
+            )
+            state = _state = (menu, hashlib.md5(repr(menu).encode()).hexdigest(), version, time.monotonic())
+    return state
+
+
+def get_category_menu():
+    """
+    Categories for the navigation menu, kept in process memory.
+
+    The list is rebuilt once CATEGORY_MENU_TTL seconds have passed. A category change rebuilds
+    it at once in the process that made it, and in all processes with the shared cache
+    (CACHES_ENABLE), where the invalidation version lives.
+    """
+    return _load_menu()[0]
+
+
+def menu_version():
+    """
+    Digest of the menu this process renders; part of the ETag of every page, since they all
+    show it. It is derived from the menu itself, so a rebuilt menu always changes the ETag.
+    """
+    return _load_menu()[1]
+
+
+async def amenu_version():
+    """
+    menu_version() for async views: the cache is read outside the event loop, the database
+    only when the menu has to be rebuilt.
+    """
+    version = await sync_to_async(cache.get, thread_sensitive=False)(VERSION_CACHE_KEY, 0)
+    state = _state
+    if _is_fresh(state, version):
+        return state[1]
+    return (await sync_to_async(_load_menu)(version))[1]
+
+
+def invalidate_menu():
+    global _state
+    _state = None
+    if not cache.add(VERSION_CACHE_KEY, 1, timeout=None):
+        cache.incr(VERSION_CACHE_KEY)
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.2 on 2026-10-18 07:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0006_product_owner"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="current_version",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="catalog.version",
+                verbose_name="Текущая версия",
+            ),
+        ),
+    ]
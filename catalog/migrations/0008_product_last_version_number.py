@@ -0,0 +1,35 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:00
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_last_version_number(apps, schema_editor):
+    Product = apps.get_model("catalog", "Product")
+    Version = apps.get_model("catalog", "Version")
+    max_number = (
+        Version.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(max_number=Max("version_number"))
+        .values("max_number")
+    )
+    Product.objects.update(last_version_number=Coalesce(Subquery(max_number), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0007_product_current_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="last_version_number",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Последний номер версии"
+            ),
+        ),
+        migrations.RunPython(fill_last_version_number, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:01
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce({row}product_name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({row}product_description, '')), 'B')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"""
+        CREATE FUNCTION catalog_product_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    schema_editor.execute("""
+        CREATE TRIGGER catalog_product_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF product_name, product_description, search_vector
+        ON catalog_product
+        FOR EACH ROW EXECUTE FUNCTION catalog_product_search_vector_update()
+        """)
+    schema_editor.execute(
+        f"UPDATE catalog_product SET search_vector = {SEARCH_VECTOR_SQL.format(row='')}"
+    )
+    schema_editor.execute(
+        "CREATE INDEX catalog_product_search_vector_gin "
+        "ON catalog_product USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS catalog_product_search_vector_gin")
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS catalog_product_search_vector_trigger ON catalog_product"
+    )
+    schema_editor.execute(
+        "DROP FUNCTION IF EXISTS catalog_product_search_vector_update()"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0008_product_last_version_number"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
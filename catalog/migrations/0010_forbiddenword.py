@@ -0,0 +1,41 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0009_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ForbiddenWord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "word",
+                    models.CharField(
+                        help_text="Слово ищется целиком и во всех формах",
+                        max_length=50,
+                        unique=True,
+                        verbose_name="Запрещённое слово",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "запрещённое слово",
+                "verbose_name_plural": "запрещённые слова",
+                "ordering": ["word"],
+            },
+        ),
+    ]
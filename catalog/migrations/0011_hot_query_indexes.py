@@ -0,0 +1,43 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0010_forbiddenword"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["product_name", "product_description", "price", "id"],
+                name="product_ordering_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "is_published"],
+                name="product_category_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_published", True)),
+                fields=["is_published"],
+                name="product_published_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="version",
+            index=models.Index(
+                condition=models.Q(("is_current", True)),
+                fields=["product"],
+                name="version_current_idx",
+            ),
+        ),
+    ]
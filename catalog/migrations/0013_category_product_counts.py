@@ -0,0 +1,52 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_product_counts(apps, schema_editor):
+    Category = apps.get_model("catalog", "Category")
+    Product = apps.get_model("catalog", "Product")
+    products = Product.objects.filter(category=OuterRef("pk")).order_by().values("category")
+    total = products.annotate(total=Count("pk")).values("total")
+    published = products.filter(is_published=True).annotate(total=Count("pk")).values("total")
+    Category.objects.update(
+        product_count=Coalesce(Subquery(total), 0),
+        published_count=Coalesce(Subquery(published), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0012_product_updated_idx"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="category",
+            options={
+                "ordering": ["category_name", "pk"],
+                "verbose_name": "категория",
+                "verbose_name_plural": "категории",
+            },
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="product_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Количество продуктов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="published_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Количество опубликованных продуктов",
+            ),
+        ),
+        migrations.RunPython(fill_product_counts, migrations.RunPython.noop),
+    ]
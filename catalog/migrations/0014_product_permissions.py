@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0013_category_product_counts"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="product",
+            options={
+                "ordering": ["product_name", "product_description", "price"],
+                "permissions": [
+                    ("can_unpublish_product", "Может отменять публикацию продукта"),
+                    (
+                        "can_change_product_description",
+                        "Может менять описание продукта",
+                    ),
+                    ("can_change_product_category", "Может менять категорию продукта"),
+                ],
+                "verbose_name": "Продукт",
+                "verbose_name_plural": "Продукты",
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+import django.db.models.deletion
+
+
+def fill_price_stats(apps, schema_editor):
+    CategoryPriceStats = apps.get_model("catalog", "CategoryPriceStats")
+    Product = apps.get_model("catalog", "Product")
+    groups = (
+        Product.objects.order_by()
+        .values("category", "is_published")
+        .annotate(product_count=Count("pk"), price_sum=Sum("price"), min_price=Min("price"), max_price=Max("price"))
+    )
+    CategoryPriceStats.objects.bulk_create(
+        (CategoryPriceStats(category_id=group.pop("category"), **group) for group in groups), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0014_product_permissions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryPriceStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_published", models.BooleanField(verbose_name="Опубликовано")),
+                (
+                    "product_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество продуктов"
+                    ),
+                ),
+                (
+                    "price_sum",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=18,
+                        verbose_name="Сумма цен",
+                    ),
+                ),
+                (
+                    "min_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Минимальная цена",
+                    ),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Максимальная цена",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_stats",
+                        to="catalog.category",
+                        verbose_name="Категория",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "статистика цен категории",
+                "verbose_name_plural": "статистика цен категорий",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="categorypricestats",
+            constraint=models.UniqueConstraint(
+                fields=("category", "is_published"), name="unique_category_price_stats"
+            ),
+        ),
+        migrations.RunPython(fill_price_stats, migrations.RunPython.noop),
+    ]
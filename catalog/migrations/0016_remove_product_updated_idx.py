@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0015_category_price_stats"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="product_updated_idx",
+        ),
+    ]
@@ -0,0 +1,169 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from catalog.menu import amenu_version, menu_version
+from catalog.permissions import get_permission_snapshot
+
+
+class ConditionalResponseMixin:
+    """
+    ETag / Last-Modified support for GET views, like django.views.decorators.http.condition.
+
+    A request with matching validators gets 304 Not Modified before the template is rendered.
+    """
+
+    def get_etag_parts(self):
+        """
+        Values the page depends on; None disables the ETag.
+        """
+        return None
+
+    def get_last_modified(self):
+        return None
+
+    def get_validators(self, parts, last_modified):
+        return self.build_validators(parts, last_modified, menu_version() if parts is not None else None)
+
+    def build_validators(self, parts, last_modified, menu):
+        etag = None
+        if parts is not None:
+            # Страница зависит от пользователя и его прав (меню, кнопки) и от меню категорий
+            parts = (
+                *parts,
+                self.request.user.pk,
+                get_permission_snapshot(self.request).fingerprint,
+                menu,
+            )
+            etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    @staticmethod
+    def set_validators(response, etag, timestamp):
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        if timestamp and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag, timestamp = self.get_validators(self.get_etag_parts(), self.get_last_modified())
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, timestamp)
+
+
+class AsyncConditionalResponseMixin(ConditionalResponseMixin):
+    """
+    Async get() for the ASGI deployment.
+
+    The data is loaded with the async ORM in aprepare(), after that the validators and the
+    context are computed without queries. Django renders the returned TemplateResponse in
+    its sync thread, because templates may still touch the database (menu, permissions).
+    """
+
+    async def aprepare(self):
+        pass
+
+    async def aget_etag_parts(self):
+        return self.get_etag_parts()
+
+    async def aget_last_modified(self):
+        return self.get_last_modified()
+
+    async def get(self, request, *args, **kwargs):
+        # request.user ленивый и читает сессию из базы, права могут читаться из базы:
+        # загружаем их до обращений из async-кода
+        await sync_to_async(get_permission_snapshot)(request)
+        await self.aprepare()
+        parts = await self.aget_etag_parts()
+        menu = await amenu_version() if parts is not None else None
+        etag, timestamp = self.build_validators(parts, await self.aget_last_modified(), menu)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self.render_to_response(self.get_context_data())
+        return self.set_validators(response, etag, timestamp)
+
+
+class AsyncSingleObjectMixin(AsyncConditionalResponseMixin):
+    """
+    Async get() for DetailView subclasses whose get_object() returns the cached self.object.
+    """
+
+    async def aprepare(self):
+        self.object = await self.aget_object()
+
+    async def aget_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(f"Не найден объект «{queryset.model._meta.verbose_name}»")
+
+
+class AsyncKeysetListMixin(AsyncConditionalResponseMixin):
+    """
+    Async get() for ListView subclasses with KeysetPaginationMixin.
+    """
+
+    async def aprepare(self):
+        # object_list остаётся ленивым QuerySet: по нему ListView выбирает имя переменной контекста
+        self.object_list = self.get_queryset()
+        _, self.page, _, _ = await self.apaginate_queryset(self.object_list, self.get_paginate_by(self.object_list))
+
+    def paginate_queryset(self, queryset, page_size):
+        # Страница уже загружена в aprepare()
+        return None, self.page, self.page.object_list, self.page.has_other_pages()
+
+
+class ProductPermissionsMixin:
+    """
+    Puts the request's permission snapshot into the context and marks the shown products
+    with can_edit / can_delete, evaluated for the whole page at once.
+    """
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        permissions = get_permission_snapshot(self.request)
+        if 'object' in context_data:
+            permissions.annotate_products([context_data['object']])
+        else:
+            permissions.annotate_products(context_data['object_list'])
+        context_data['permissions'] = permissions
+        return context_data
+
+
+class ProductObjectPermissionMixin(AccessMixin):
+    """
+    Allows the view only for products marked with permission_flag by the snapshot;
+    anonymous users are sent to the login page.
+    """
+
+    permission_flag = "can_edit"
+
+    def dispatch(self, request, *args, **kwargs):
+        # У анонимного пользователя нет ни прав, ни своих продуктов
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        product = super().get_object(queryset)
+        get_permission_snapshot(self.request).annotate_products([product])
+        if not getattr(product, self.permission_flag):
+            raise PermissionDenied
+        return product
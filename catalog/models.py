@@ -1,9 +1,41 @@
-from django.db import models
+from decimal import Decimal
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
 
 from users.models import User, BLANK_NULL_TRUE
 
 NULLABLE = {"blank": True, "null": True}
 
+
+class CategoryManager(models.Manager):
+    def recount(self, pks=None):
+        """
+        Recompute the denormalized product counters, for all categories or only the given ones.
+        """
+        products = Product.objects.filter(category=OuterRef("pk")).order_by().values("category")
+        total = products.annotate(total=Count("pk")).values("total")
+        published = products.filter(is_published=True).annotate(total=Count("pk")).values("total")
+        queryset = self.all() if pks is None else self.filter(pk__in=pks)
+        return queryset.update(
+            product_count=Coalesce(Subquery(total), 0),
+            published_count=Coalesce(Subquery(published), 0),
+        )
+
+    def shift_counts(self, category_id, products, published):
+        """
+        Add deltas to the counters of one category with a single UPDATE.
+        """
+        # Greatest не даёт счётчику уйти в минус, если он разошёлся с таблицей до пересчёта
+        return self.filter(pk=category_id).update(
+            product_count=Greatest(F("product_count") + products, 0),
+            published_count=Greatest(F("published_count") + published, 0),
+        )
+
+
 class Category(models.Model):
     category_name = models.CharField(
         max_length=50,
@@ -14,12 +46,30 @@ class Category(models.Model):
         verbose_name="Описание категории", help_text="Опишите категорию"
     )
 
+    # Поддерживаются сигналами Product (catalog/signals.py), пересчитываются командой recount_categories
+    product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Количество продуктов")
+    published_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество опубликованных продуктов"
+    )
+
+    objects = CategoryManager()
+
     def __str__(self):
         return self.category_name
 
     class Meta:
         verbose_name = "категория"
         verbose_name_plural = "категории"
+        ordering = ["category_name", "pk"]
+
+
+# Поля, от которых зависят счётчики категорий, статистика цен и рейтинг популярных продуктов
+COUNTED_FIELDS = {"category", "category_id", "is_published", "price"}
+
+
+def affects_counts(update_fields):
+    # save(update_fields=["views_counter"]) и подобные ничего не меняют в счётчиках
+    return update_fields is None or bool(COUNTED_FIELDS & set(update_fields))
 
 
 class Product(models.Model):
@@ -71,16 +121,272 @@ class Product(models.Model):
         on_delete=models.SET_NULL,
     )
 
+    current_version = models.ForeignKey(
+        "Version",
+        verbose_name="Текущая версия",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        editable=False,
+        **NULLABLE,
+    )
+
+    last_version_number = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Последний номер версии",
+    )
+
+    # На PostgreSQL заполняется триггером из миграции 0009 и индексируется GIN-индексом
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return self.product_name
 
+    def save(self, *args, **kwargs):
+        # Сигналы читают прежнее состояние под блокировкой строки и меняют счётчики категорий и
+        # статистику цен: это одна транзакция с самим сохранением
+        if not affects_counts(kwargs.get("update_fields")):
+            return super().save(*args, **kwargs)
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
         ordering = ["product_name", "product_description", "price"]
+        permissions = [
+            ("can_unpublish_product", "Может отменять публикацию продукта"),
+            ("can_change_product_description", "Может менять описание продукта"),
+            ("can_change_product_category", "Может менять категорию продукта"),
+        ]
+        indexes = [
+            # Порядок списка и ключ курсорной пагинации ProductListView
+            models.Index(fields=["product_name", "product_description", "price", "id"], name="product_ordering_idx"),
+            models.Index(fields=["category", "is_published"], name="product_category_published_idx"),
+            models.Index(fields=["is_published"], name="product_published_idx", condition=models.Q(is_published=True)),
+        ]
 
     def get_active_version(self):
-        return self.versions.filter(is_current=True).first()
+        # Указатель поддерживается Version.save, отдельный запрос не нужен
+        return self.current_version
+
+
+class PriceStatsManager(models.Manager):
+    def _group(self, category_id, is_published):
+        return self.filter(category_id=category_id, is_published=is_published)
+
+    def _lock(self, *groups):
+        """
+        Lock the rows of the groups in primary key order, so concurrent moves cannot deadlock.
+        """
+        condition = Q()
+        for category_id, is_published in groups:
+            condition |= Q(category_id=category_id, is_published=is_published)
+        list(self.filter(condition).order_by("pk").select_for_update().values_list("pk", flat=True))
+
+    def _create_group(self, category_id, is_published):
+        # Строка группы появляется с первым продуктом; при конфликте её уже создал другой запрос
+        self.bulk_create(
+            [CategoryPriceStats(category_id=category_id, is_published=is_published)], ignore_conflicts=True
+        )
+
+    def add_price(self, category_id, is_published, price):
+        """
+        Account one more product of the group with an UPDATE of its row.
+        """
+        price = Value(Product._meta.get_field("price").to_python(price), output_field=models.DecimalField())
+        self._create_group(category_id, is_published)
+        return self._group(category_id, is_published).update(
+            product_count=F("product_count") + 1,
+            price_sum=F("price_sum") + price,
+            min_price=Least(Coalesce(F("min_price"), price), price),
+            max_price=Greatest(Coalesce(F("max_price"), price), price),
+        )
+
+    def remove_price(self, category_id, is_published, price):
+        """
+        Remove one product from the group. Min/max are re-read from the products of the group
+        only when the removed price was one of them.
+        """
+        with transaction.atomic():
+            self._lock((category_id, is_published))
+            self._remove_price(category_id, is_published, price)
+
+    def _remove_price(self, category_id, is_published, price):
+        # Вызывается под блокировкой строки: иначе параллельное удаление другого продукта с той же
+        # ценой перечитало бы границы до фиксации этого и оставило бы устаревший min/max
+        price = Product._meta.get_field("price").to_python(price)
+        group = self._group(category_id, is_published)
+        group.update(
+            product_count=Greatest(F("product_count") - 1, 0),
+            price_sum=F("price_sum") - Value(price, output_field=models.DecimalField()),
+        )
+        products = (
+            Product.objects.filter(category_id=category_id, is_published=is_published).order_by().values("category")
+        )
+        group.filter(min_price=price).update(min_price=Subquery(products.annotate(value=Min("price")).values("value")))
+        group.filter(max_price=price).update(max_price=Subquery(products.annotate(value=Max("price")).values("value")))
+
+    def change_price(self, previous, current):
+        """
+        Move one product from the previous (category_id, is_published, price) to the current one
+        in a single transaction; the rows of both groups are locked first.
+        """
+        with transaction.atomic():
+            self._create_group(*current[:2])
+            self._lock(previous[:2], current[:2])
+            self._remove_price(*previous)
+            self.add_price(*current)
+
+    def rebuild(self):
+        """
+        Recompute all statistics from Product in one aggregate query.
+        """
+        groups = (
+            Product.objects.order_by()
+            .values("category", "is_published")
+            .annotate(product_count=Count("pk"), price_sum=Sum("price"), min_price=Min("price"), max_price=Max("price"))
+        )
+        with transaction.atomic():
+            self.all().delete()
+            stats = self.bulk_create(
+                (CategoryPriceStats(category_id=group.pop("category"), **group) for group in groups), batch_size=1000
+            )
+        return len(stats)
+
+
+class CategoryPriceStats(models.Model):
+    """
+    Price statistics of the products of a category with one publish state.
+
+    Maintained by Product signals (catalog/signals.py), rebuilt by the rebuild_price_stats command.
+    """
+
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="price_stats", verbose_name="Категория"
+    )
+    is_published = models.BooleanField(verbose_name="Опубликовано")
+    product_count = models.PositiveIntegerField(default=0, verbose_name="Количество продуктов")
+    # Точность цен как у Product.price; для суммы добавлены разряды
+    price_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Сумма цен")
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Минимальная цена", **NULLABLE)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Максимальная цена", **NULLABLE)
+
+    objects = PriceStatsManager()
+
+    @property
+    def avg_price(self):
+        if not self.product_count:
+            return None
+        return (self.price_sum / self.product_count).quantize(Decimal("0.01"))
+
+    def __str__(self):
+        return f"{self.category_id}: {self.product_count}"
+
+    class Meta:
+        verbose_name = "статистика цен категории"
+        verbose_name_plural = "статистика цен категорий"
+        constraints = [
+            models.UniqueConstraint(fields=["category", "is_published"], name="unique_category_price_stats")
+        ]
+
+
+def supports_update_returning(connection):
+    """
+    UPDATE ... RETURNING: PostgreSQL and SQLite >= 3.35. MariaDB only has INSERT/DELETE ...
+    RETURNING, so can_return_columns_from_insert alone is not enough.
+    """
+    return connection.vendor == "postgresql" or (
+        connection.vendor == "sqlite" and connection.features.can_return_columns_from_insert
+    )
+
+
+class VersionManager(models.Manager):
+    def _write_db(self):
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def reserve_numbers(self, product_id, count=1):
+        """
+        Reserve count consecutive version numbers for the product and return the last one.
+        The UPDATE locks the product row, so concurrent reservations are serialized.
+        """
+        using = self._write_db()
+        connection = connections[using]
+        if supports_update_returning(connection):
+            # Блокировка и номер за один запрос
+            table = connection.ops.quote_name(Product._meta.db_table)
+            column = connection.ops.quote_name("last_version_number")
+            pk_column = connection.ops.quote_name(Product._meta.pk.column)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = {column} + %s WHERE {pk_column} = %s RETURNING {column}",
+                    [count, product_id],
+                )
+                return cursor.fetchone()[0]
+
+        products = Product.objects.using(using)
+        products.filter(pk=product_id).update(last_version_number=F("last_version_number") + count)
+        return products.values_list("last_version_number", flat=True).get(pk=product_id)
+
+    def make_current(self, version):
+        """
+        Clear is_current on the other versions of the product and point Product.current_version
+        at version. One statement on PostgreSQL; call it while the product row is locked.
+        """
+        using = self._write_db()
+        connection = connections[using]
+        # updated_at меняется вместе с версией: от него считаются ETag и Last-Modified страниц
+        now = timezone.now()
+        if connection.vendor == "postgresql":
+            quote = connection.ops.quote_name
+            version_meta, product_meta = self.model._meta, Product._meta
+            is_current = quote(version_meta.get_field("is_current").column)
+            updated_at = product_meta.get_field("updated_at")
+            with connection.cursor() as cursor:
+                # Изменяющий CTE: обе таблицы обновляются одним запросом к базе
+                cursor.execute(
+                    f"WITH cleared AS ("
+                    f"UPDATE {quote(version_meta.db_table)} SET {is_current} = false "
+                    f"WHERE {quote(version_meta.get_field('product').column)} = %s AND {is_current} "
+                    f"AND {quote(version_meta.pk.column)} <> %s) "
+                    f"UPDATE {quote(product_meta.db_table)} "
+                    f"SET {quote(product_meta.get_field('current_version').column)} = %s, "
+                    f"{quote(updated_at.column)} = %s WHERE {quote(product_meta.pk.column)} = %s",
+                    [
+                        version.product_id, version.pk,
+                        version.pk, updated_at.get_db_prep_value(now, connection), version.product_id,
+                    ],
+                )
+            return
+        self.using(using).filter(product_id=version.product_id, is_current=True).exclude(pk=version.pk).update(
+            is_current=False
+        )
+        Product.objects.using(using).filter(pk=version.product_id).update(current_version=version, updated_at=now)
+
+    def bulk_create_versions(self, product, names):
+        """
+        Create versions with consecutive numbers in one transaction, the last one becomes current.
+        """
+        if not names:
+            return []
+        with transaction.atomic(using=self._write_db()):
+            last_number = self.reserve_numbers(product.pk, len(names))
+            first_number = last_number - len(names) + 1
+            versions = self.bulk_create(
+                Version(
+                    product=product,
+                    version_number=first_number + index,
+                    version_name=name,
+                    is_current=index == len(names) - 1,
+                )
+                for index, name in enumerate(names)
+            )
+            self.make_current(versions[-1])
+        product.last_version_number = last_number
+        product.current_version = versions[-1]
+        return versions
+
 
 class Version(models.Model):
     product = models.ForeignKey(
@@ -106,23 +412,45 @@ class Version(models.Model):
         verbose_name="признак текущей версии", help_text="Версия активна?", default=True
     )
 
+    objects = VersionManager()
+
     def save(self, *args, **kwargs):
-        # Если номер версии не установлен, получаем максимальный номер версии для продукта
-        if not self.version_number:
-            max_version = Version.objects.filter(product=self.product).aggregate(models.Max('version_number'))[
-                'version_number__max']
-            self.version_number = (max_version + 1) if max_version is not None else 1
+        adding = self._state.adding
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        versions = Version.objects.db_manager(using)
+        with transaction.atomic(using=using):
+            if self.product_id:
+                if not self.version_number:
+                    # Номер берём из счётчика продукта: запрос блокирует строку продукта до конца транзакции
+                    self.version_number = versions.reserve_numbers(self.product_id)
+                else:
+                    Product.objects.using(using).filter(pk=self.product_id).update(
+                        last_version_number=Greatest(F("last_version_number"), self.version_number)
+                    )
+            elif not self.version_number:
+                self.version_number = 1
 
-        # Устанавливаем флаг is_current для всех предыдущих версий в False
-        Version.objects.filter(product=self.product, is_current=True).update(is_current=False)
+            # Устанавливаем текущую версию как актуальную
+            self.is_current = True
 
-        # Устанавливаем текущую версию как актуальную
-        self.is_current = True
+            # Сохраняем версию
+            super().save(*args, **kwargs)
 
-        # Сохраняем версию
-        super().save(*args, **kwargs)
+            if not adding:
+                # Версию могли перенести на другой продукт: старый указатель больше не актуален
+                Product.objects.using(using).filter(current_version=self).exclude(pk=self.product_id).update(
+                    current_version=None, updated_at=timezone.now()
+                )
+            if self.product_id:
+                # Остальные версии продукта перестают быть текущими, указатель продукта - на эту
+                versions.make_current(self)
 
-        super().save(*args, **kwargs)
+    def delete(self, *args, **kwargs):
+        # Указатель Product.current_version обнуляется через on_delete=SET_NULL
+        with transaction.atomic():
+            if self.product_id:
+                Product.objects.filter(pk=self.product_id).update(updated_at=timezone.now())
+            return super().delete(*args, **kwargs)
 
     class Meta:
         verbose_name = "Версия"
@@ -131,6 +459,26 @@ class Version(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['product', 'version_number'], name='unique_product_version')
         ]
+        indexes = [
+            models.Index(fields=["product"], name="version_current_idx", condition=models.Q(is_current=True)),
+        ]
 
     def __str__(self):
         return self.version_name
+
+
+class ForbiddenWord(models.Model):
+    word = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name="Запрещённое слово",
+        help_text="Слово ищется целиком и во всех формах",
+    )
+
+    class Meta:
+        verbose_name = "запрещённое слово"
+        verbose_name_plural = "запрещённые слова"
+        ordering = ["word"]
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,107 @@
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import ForbiddenWord
+
+VERSION_CACHE_KEY = "forbidden_words:version"
+
+# Окончания, которые отбрасываются, чтобы «крипта», «крипты» и «крипту» давали одну основу
+ENDINGS = sorted(
+    (
+        "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "иях", "иям", "ией",
+        "ия", "ие", "ий", "ый", "ой", "ая", "яя", "ое", "ее", "ов", "ев", "ам", "ям",
+        "ах", "ях", "ом", "ем", "ую", "юю",
+        "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LENGTH = 4
+
+
+def normalize(text):
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def stem(word):
+    word = normalize(word.strip().lower())
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[: -len(ending)]
+    return word
+
+
+def _trie_pattern(node):
+    """
+    Turn a character trie into a regex without backtracking over sibling words.
+    """
+    if "" in node and len(node) == 1:
+        return ""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class ForbiddenWordsMatcher:
+    """
+    Finds forbidden words in a text with one compiled regex built from a trie of word stems.
+    """
+
+    def __init__(self, words):
+        trie = {}
+        for word in {stem(word) for word in words if word.strip()}:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self.regex = re.compile(r"\b" + _trie_pattern(trie) + r"\w*", re.IGNORECASE) if trie else None
+
+    def find(self, text):
+        """
+        Return the first forbidden word found in text, or None.
+        """
+        if self.regex is None or not text:
+            return None
+        match = self.regex.search(normalize(text))
+        return match.group(0) if match else None
+
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_version = None
+_built_at = 0.0
+
+
+def get_matcher():
+    """
+    Matcher built from settings.FORBIDDEN_WORDS and the ForbiddenWord table.
+
+    It is rebuilt when the table changes (the version is kept in the cache) or once
+    FORBIDDEN_WORDS_TTL seconds have passed, so edits apply without a restart.
+    """
+    global _matcher, _matcher_version, _built_at
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    if _matcher is None or version != _matcher_version or time.monotonic() - _built_at > settings.FORBIDDEN_WORDS_TTL:
+        with _lock:
+            words = list(settings.FORBIDDEN_WORDS)
+            words += ForbiddenWord.objects.values_list("word", flat=True)
+            _matcher = ForbiddenWordsMatcher(words)
+            _matcher_version = version
+            _built_at = time.monotonic()
+    return _matcher
+
+
+@receiver([post_save, post_delete], sender=ForbiddenWord)
+def invalidate_matcher(**kwargs):
+    global _matcher
+    _matcher = None
+    if not cache.add(VERSION_CACHE_KEY, 1, timeout=None):
+        cache.incr(VERSION_CACHE_KEY)
@@ -0,0 +1,150 @@
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """
+    Page of a keyset (cursor) pagination: knows only its neighbours, not the total count.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """
+    Cursor pagination for ListView without OFFSET and COUNT(*).
+
+    keyset_ordering is a tuple of field names ("-" for descending order) that ends with
+    a unique field, so each row has an unambiguous position. NULLs keep the database's
+    native position (largest on PostgreSQL, smallest on SQLite), so plain indexes match.
+    """
+
+    keyset_ordering = ("pk",)
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        keys, cursor, values, backwards = self._parse_cursor(queryset)
+        rows = list(self.get_keyset_queryset(queryset, values, backwards)[:page_size + 1])
+        return self._build_page(rows, page_size, keys, cursor, backwards)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        keys, cursor, values, backwards = self._parse_cursor(queryset)
+        rows = [row async for row in self.get_keyset_queryset(queryset, values, backwards)[:page_size + 1]]
+        return self._build_page(rows, page_size, keys, cursor, backwards)
+
+    def _parse_cursor(self, queryset):
+        keys = self._get_keys(queryset.model)
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        direction, values = self._decode_cursor(cursor, keys) if cursor else ("n", None)
+        return keys, cursor, values, direction == "p"
+
+    def _build_page(self, rows, page_size, keys, cursor, backwards):
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self._encode_cursor("n", rows[-1], keys)
+            if cursor and (has_more or not backwards):
+                previous_cursor = self._encode_cursor("p", rows[0], keys)
+
+        page = KeysetPage(rows, next_cursor, previous_cursor)
+        return None, page, rows, page.has_other_pages()
+
+    def get_keyset_queryset(self, queryset, values=None, backwards=False):
+        """
+        Rows after (or before, for backwards) the cursor values in keyset order.
+        """
+        keys = self._get_keys(queryset.model)
+        if values is not None:
+            nulls_largest = connections[queryset.db].vendor in ("postgresql", "oracle")
+            queryset = queryset.filter(self._keyset_filter(keys, values, backwards, nulls_largest))
+
+        # Для предыдущей страницы выбираем строки в обратном порядке и затем разворачиваем их
+        ordering = [
+            F(name).desc() if descending != backwards else F(name).asc()
+            for name, descending, _ in keys
+        ]
+        return queryset.order_by(*ordering)
+
+    def _get_keys(self, model):
+        keys = []
+        for item in self.keyset_ordering:
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            keys.append((name, descending, field))
+        return keys
+
+    @staticmethod
+    def _keyset_filter(keys, values, backwards, nulls_largest):
+        """
+        Lexicographic "strictly after the cursor row" condition in the scan order.
+        """
+        condition = Q(pk__in=[])
+        for (name, descending, field), value in reversed(list(zip(keys, values))):
+            scan_descending = descending != backwards
+            # NULL идёт в конце просмотра, если база считает его наибольшим и просмотр по возрастанию
+            nulls_at_end = field.null and nulls_largest != scan_descending
+            if value is None:
+                equal = Q(**{f"{name}__isnull": True})
+                strict = Q(pk__in=[]) if nulls_at_end else Q(**{f"{name}__isnull": False})
+            else:
+                equal = Q(**{name: value})
+                strict = Q(**{f"{name}__{'lt' if scan_descending else 'gt'}": value})
+                if nulls_at_end:
+                    strict |= Q(**{f"{name}__isnull": True})
+            condition = strict | (equal & condition)
+        return condition
+
+    def get_cursor_values(self, row, keys):
+        """
+        Values of the ordering keys of a page row; rows are model instances by default.
+        """
+        return [getattr(row, field.attname) for _, _, field in keys]
+
+    def _encode_cursor(self, direction, row, keys):
+        values = self.get_cursor_values(row, keys)
+        payload = json.dumps([direction, values], cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor, keys):
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            direction, raw_values = json.loads(payload)
+            if direction not in ("n", "p") or len(raw_values) != len(keys):
+                raise ValueError
+            values = [
+                None if raw is None else field.to_python(raw)
+                for (_, _, field), raw in zip(keys, raw_values)
+            ]
+        except Exception:
+            raise Http404("Неверный курсор страницы")
+        return direction, values
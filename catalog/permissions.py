@@ -0,0 +1,172 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import Product
+
+VERSION_CACHE_KEY = "permissions:version"
+USER_CACHE_KEY = "permissions:user:{pk}:{version}"
+
+# Права, которые владелец продукта получает на свой продукт
+OWNER_PERMISSIONS = frozenset({"catalog.view_product", "catalog.change_product", "catalog.delete_product"})
+
+MODERATOR_PERMISSIONS = ("catalog.can_change_product_description", "catalog.can_change_product_category")
+
+
+def _new_version():
+    # Версия от времени: после вытеснения ключа версии старые записи прав не становятся снова действительными
+    return time.time_ns()
+
+
+def _permissions_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def _user_cache_key(pk):
+    return USER_CACHE_KEY.format(pk=pk, version=_permissions_version())
+
+
+def get_user_permissions(user):
+    """
+    Model permissions of the user ("app_label.codename").
+
+    They are cached only in the shared cache (CACHES_ENABLE): a per-process cache would not
+    see a permission revoked through another worker, so without it they are read every request.
+    """
+    if not user.is_active or user.is_anonymous:
+        return frozenset()
+    if not settings.CACHES_ENABLE:
+        return frozenset(user.get_all_permissions())
+    key = _user_cache_key(user.pk)
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = frozenset(user.get_all_permissions())
+        cache.set(key, permissions, timeout=settings.PERMISSIONS_CACHE_TIMEOUT)
+    return permissions
+
+
+class PermissionSnapshot:
+    """
+    Permissions of the request user, computed once per request.
+    """
+
+    def __init__(self, user):
+        self.user_pk = user.pk if user.is_active else None
+        self.is_superuser = user.is_active and user.is_superuser
+        self.permissions = get_user_permissions(user)
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+    @property
+    def can_unpublish(self):
+        return self.has_perm("catalog.can_unpublish_product")
+
+    @property
+    def can_edit_as_moderator(self):
+        return any(self.has_perm(perm) for perm in MODERATOR_PERMISSIONS)
+
+    @property
+    def fingerprint(self):
+        # Для ETag: у суперпользователя есть все права, перечислять их не нужно
+        return ("*",) if self.is_superuser else tuple(sorted(self.permissions))
+
+    def allowed_pks(self, perm, products):
+        """
+        Primary keys of the products the user may act on with perm: all of them with the
+        model permission, otherwise the ones the user owns.
+        """
+        if self.has_perm(perm):
+            return {product.pk for product in products}
+        if perm not in OWNER_PERMISSIONS or self.user_pk is None:
+            return set()
+        return {product.pk for product in products if product.owner_id == self.user_pk}
+
+    def annotate_products(self, products):
+        """
+        Set can_edit and can_delete on every product of the page in one pass.
+        """
+        if self.can_edit_as_moderator:
+            editable = {product.pk for product in products}
+        else:
+            editable = self.allowed_pks("catalog.change_product", products)
+        deletable = self.allowed_pks("catalog.delete_product", products)
+        for product in products:
+            product.can_edit = product.pk in editable
+            product.can_delete = product.pk in deletable
+        return products
+
+
+def get_permission_snapshot(request):
+    snapshot = getattr(request, "_permission_snapshot", None)
+    if snapshot is None:
+        snapshot = request._permission_snapshot = PermissionSnapshot(request.user)
+    return snapshot
+
+
+class OwnerPermissionBackend(BaseBackend):
+    """
+    Grants the owner of a product the view, change and delete permissions on that product.
+    """
+
+    def has_perm(self, user_obj, perm, obj=None):
+        return (
+            isinstance(obj, Product)
+            and perm in OWNER_PERMISSIONS
+            and user_obj.is_active
+            and obj.owner_id is not None
+            and obj.owner_id == user_obj.pk
+        )
+
+
+def invalidate_all_permissions():
+    if settings.CACHES_ENABLE:
+        cache.set(VERSION_CACHE_KEY, _new_version(), timeout=None)
+
+
+def invalidate_user_permissions(pks):
+    if settings.CACHES_ENABLE:
+        cache.delete_many([_user_cache_key(pk) for pk in pks])
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход в систему сохраняет только last_login: права от этого не меняются
+    if update_fields is None or {"is_active", "is_superuser"} & set(update_fields):
+        invalidate_user_permissions([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_user_permissions([instance.pk])
+    elif pk_set:
+        # group.user_set.add(...): меняются права перечисленных пользователей
+        invalidate_user_permissions(pk_set)
+    else:
+        invalidate_all_permissions()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Permission)
+def groups_changed(**kwargs):
+    # Права группы действуют на всех её участников: сбрасываем кэш целиком
+    if kwargs.get("action", "post_").startswith("post_"):
+        invalidate_all_permissions()
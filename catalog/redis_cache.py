@@ -0,0 +1,10 @@
+from django_redis.cache import RedisCache
+
+from catalog.instrumentation import InstrumentedCacheMixin
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """
+    django-redis cache with hit/miss counting; its connection is shared with the view
+    counters and the leaderboard through django_redis.get_redis_connection.
+    """
@@ -0,0 +1,110 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "primary_pin"
+
+# Приложения, которые всегда читаются с основной базы: сессия записана только что
+PRIMARY_ONLY_APPS = {"sessions"}
+
+_current_state = ContextVar("replica_state", default=None)
+
+
+class ReplicaState:
+    """
+    Routing state of one request: may reads go to a replica, and has the request written.
+    """
+
+    def __init__(self, pinned=False):
+        self.use_replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """
+    Sends reads of views marked with use_read_replica = True to settings.DATABASE_REPLICAS.
+
+    Everything else goes to the primary: writes, reads outside such views and outside
+    requests, reads after a write in the same request and, for DATABASE_REPLICA_LAG
+    seconds after a write, reads of the same client (see ReplicaPinningMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _current_state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.pinned
+            or not settings.DATABASE_REPLICAS
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _current_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит с репликацией
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Enables replica reads for views with use_read_replica = True and keeps a client that
+    has just written on the primary for DATABASE_REPLICA_LAG seconds via a cookie.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_state.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _current_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_state.reset(token)
+        return self.pin(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current_state.get()
+        view_class = getattr(view_func, "view_class", None)
+        if state is not None and getattr(view_class, "use_read_replica", False):
+            state.use_replica = True
+
+    @staticmethod
+    def pin(response, state):
+        if state.wrote and settings.DATABASE_REPLICAS and settings.DATABASE_REPLICA_LAG > 0:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.DATABASE_REPLICA_LAG, httponly=True, samesite="Lax"
+            )
+        return response
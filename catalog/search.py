@@ -0,0 +1,54 @@
+from functools import reduce
+from operator import and_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Case, F, Func, IntegerField, Q, Value, When
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def register_casefold(sender, connection, **kwargs):
+    # LOWER() и LIKE в SQLite меняют регистр только у латиницы, кириллицу сравниваем через Python
+    if connection.vendor == "sqlite":
+        connection.connection.create_function("PY_CASEFOLD", 1, casefold, deterministic=True)
+
+
+def casefold(value):
+    return value.casefold() if value is not None else None
+
+
+class Casefold(Func):
+    """
+    Case-folded text: LOWER() in general, Python's str.casefold() on SQLite.
+    """
+
+    function = "LOWER"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function="PY_CASEFOLD", **extra_context)
+
+
+def search_products(queryset, query):
+    """
+    Filter products by a full-text query and annotate them with a relevance rank.
+
+    PostgreSQL uses the Russian tsvector column with its GIN index, other databases
+    fall back to case-insensitive matching of every word in name or description.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        search_query = SearchQuery(query, config="russian", search_type="websearch")
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    words = casefold(query).split()
+    if not words:
+        return queryset.none()
+    queryset = queryset.alias(folded_name=Casefold("product_name"), folded_description=Casefold("product_description"))
+    matches = [Q(folded_name__contains=word) | Q(folded_description__contains=word) for word in words]
+    in_name = [When(folded_name__contains=word, then=Value(2)) for word in words]
+    return queryset.filter(reduce(and_, matches)).annotate(
+        rank=Case(*in_name, default=Value(1), output_field=IntegerField())
+    )
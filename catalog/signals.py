@@ -0,0 +1,112 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from catalog.images import IMAGE_FIELDS, remember_image, schedule_for_instance
+from catalog.leaderboard import discard_product
+from catalog.menu import invalidate_menu
+from catalog.models import Category, CategoryPriceStats, Product, affects_counts
+
+
+def remember_image_source(sender, instance, **kwargs):
+    remember_image(instance)
+
+
+def build_image_variants(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_for_instance(instance, created, update_fields)
+
+
+for label in IMAGE_FIELDS:
+    post_init.connect(remember_image_source, sender=label, dispatch_uid=f"image_source_{label}")
+    post_save.connect(build_image_variants, sender=label, dispatch_uid=f"image_variants_{label}")
+
+
+def read_counted_state(instance, using):
+    # Блокировка строки до конца транзакции Product.save / delete: параллельное изменение того же
+    # продукта ждёт и затем видит уже новое состояние, а не вычитает ту же старую цену второй раз
+    return (
+        Product.objects.using(using).select_for_update().filter(pk=instance.pk)
+        .values_list("category_id", "is_published", "price").first()
+    )
+
+
+@receiver(pre_save, sender=Product)
+def remember_category_state(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    # Счётчики и статистика цен зависят от состояния до сохранения, берём его из базы
+    instance._counted_state = None
+    if not raw and instance.pk is not None and affects_counts(update_fields):
+        instance._counted_state = read_counted_state(instance, using)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_deleted_state(sender, instance, using=None, **kwargs):
+    # Удаление вычитает то, что записано в базе, а не возможно устаревшие поля объекта
+    instance._counted_state = read_counted_state(instance, using)
+
+
+def deleted_state(instance):
+    state = getattr(instance, "_counted_state", None)
+    return state or (instance.category_id, instance.is_published, instance.price)
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not affects_counts(update_fields):
+        return
+    previous = None if created else getattr(instance, "_counted_state", None)
+    if previous is not None:
+        previous = previous[:2]
+    current = (instance.category_id, instance.is_published)
+    if previous == current:
+        return
+    if previous is not None:
+        Category.objects.shift_counts(previous[0], -1, -int(previous[1]))
+    Category.objects.shift_counts(current[0], 1, int(current[1]))
+    transaction.on_commit(invalidate_menu)
+
+
+@receiver(post_delete, sender=Product)
+def decrease_category_counts(sender, instance, **kwargs):
+    category_id, is_published, _ = deleted_state(instance)
+    Category.objects.shift_counts(category_id, -1, -int(is_published))
+    transaction.on_commit(invalidate_menu)
+
+
+@receiver(post_save, sender=Product)
+def update_price_stats(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not affects_counts(update_fields):
+        return
+    previous = None if created else getattr(instance, "_counted_state", None)
+    current = (instance.category_id, instance.is_published, instance.price)
+    if previous == current:
+        return
+    if previous is None:
+        CategoryPriceStats.objects.add_price(*current)
+    else:
+        CategoryPriceStats.objects.change_price(previous, current)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_price_stats(sender, instance, **kwargs):
+    CategoryPriceStats.objects.remove_price(*deleted_state(instance))
+
+
+@receiver(post_save, sender=Product)
+def update_leaderboard(sender, instance, created, raw=False, **kwargs):
+    previous = None if raw or created else getattr(instance, "_counted_state", None)
+    # Снятый с публикации или перенесённый продукт уходит с досок; в новой категории его вернёт сверка
+    if previous is not None and previous[1] and (not instance.is_published or previous[0] != instance.category_id):
+        transaction.on_commit(partial(discard_product, instance.pk, previous[0]))
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_leaderboard(sender, instance, **kwargs):
+    transaction.on_commit(partial(discard_product, instance.pk, instance.category_id))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_menu(**kwargs):
+    transaction.on_commit(invalidate_menu)
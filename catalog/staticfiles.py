@@ -0,0 +1,163 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # Brotli необязателен: без него пишутся только .gz
+    brotli = None
+
+# Текстовые форматы, которые имеет смысл сжимать; картинки и шрифты уже сжаты
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".svg", ".json", ".txt", ".xml", ".html"}
+MIN_COMPRESS_SIZE = 256
+
+# Кодировки в порядке предпочтения: расширение файла-соседа и значение Content-Encoding
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+HASHED_MAX_AGE = 365 * 24 * 60 * 60
+UNHASHED_MAX_AGE = 60
+
+
+def accepted_encodings(header):
+    """
+    Encodings allowed by an Accept-Encoding header (the ones not disabled with q=0).
+    """
+    accepted = set()
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def compress(content):
+    """
+    Return {extension: compressed bytes} for the encodings that make the file smaller.
+    """
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    return {extension: data for extension, data in variants.items() if len(data) < len(content)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes .gz (and .br with the brotli package) siblings of
+    text assets during collectstatic, so they are compressed once, not per request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if posixpath.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                with self.open(name) as file:
+                    content = file.read()
+                if len(content) < MIN_COMPRESS_SIZE:
+                    continue
+                for extension, data in compress(content).items():
+                    if self.exists(name + extension):
+                        self.delete(name + extension)
+                    self._save(name + extension, ContentFile(data))
+
+
+class StaticFilesMiddleware:
+    """
+    Serves collected static files from STATIC_ROOT without a separate web server.
+
+    Picks the precompressed .br/.gz sibling allowed by Accept-Encoding, sends far-future
+    Cache-Control for content-hashed names and refuses source maps unless DEBUG is on.
+    In DEBUG the request passes through to the runserver static handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = urlsplit(settings.STATIC_URL or "").path
+        if not self.prefix.startswith("/"):
+            self.prefix = "/" + self.prefix
+        self._hashed_names = None
+        # Под ASGI цепочка остаётся асинхронной и не переключается в sync-поток ради этого middleware
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        name = self.static_name(request)
+        if name is None:
+            return self.get_response(request)
+        return self.serve(request, name)
+
+    async def __acall__(self, request):
+        name = self.static_name(request)
+        if name is None:
+            return await self.get_response(request)
+        # stat и open блокируют, поэтому файл открывается в потоке
+        return await sync_to_async(self.serve, thread_sensitive=False)(request, name)
+
+    def static_name(self, request):
+        """
+        Name of the requested file under STATIC_ROOT, None if the request is not for a static file.
+        """
+        if settings.DEBUG or not settings.STATIC_ROOT or not request.path.startswith(self.prefix):
+            return None
+        if request.method not in ("GET", "HEAD"):
+            return None
+        name = posixpath.normpath(unquote(request.path[len(self.prefix):])).lstrip("/")
+        if name.startswith("..") or name.endswith(".map"):
+            raise Http404("Файл не найден")
+        return name
+
+    @property
+    def hashed_names(self):
+        if self._hashed_names is None:
+            # Имена с хэшем из манифеста: их содержимое никогда не меняется
+            self._hashed_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        return self._hashed_names
+
+    def serve(self, request, name):
+        path = os.path.join(settings.STATIC_ROOT, name)
+        if not os.path.isfile(path):
+            raise Http404("Файл не найден")
+        stat = os.stat(path)
+        response = get_conditional_response(request, last_modified=int(stat.st_mtime))
+        if response is None:
+            content_type, _ = mimetypes.guess_type(name)
+            accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+            encoding = None
+            for candidate, extension in ENCODINGS:
+                if (candidate in accepted or "*" in accepted) and os.path.isfile(path + extension):
+                    encoding, path = candidate, path + extension
+                    break
+            response = FileResponse(open(path, "rb"), content_type=content_type or "application/octet-stream")
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+            response.headers["Last-Modified"] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if name in self.hashed_names:
+            response.headers["Cache-Control"] = f"public, max-age={HASHED_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={UNHASHED_MAX_AGE}"
+        return response
@@ -1,9 +1,44 @@
 from django import template
+from django.templatetags.static import static
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from catalog.images import srcset
+from catalog.leaderboard import get_popular_products
+from catalog.menu import get_category_menu
 
 register = template.Library()
 
-@register.filter()
-def media_filter(path):
-    if path:
-        return f'/media/{path}'
-    return '#'
+
+@register.simple_tag
+def responsive_image(file, variant, sizes="100vw", fallback=None, **attrs):
+    """
+    <img> with a WebP srcset of the variant; falls back to the original until variants are built.
+    With fallback (a static file) it is shown when there is no image or it fails to load.
+    """
+    if fallback:
+        fallback = static(fallback)
+        # srcset убираем, иначе браузер продолжит выбирать из него вместо src
+        attrs["onerror"] = f"this.onerror=null; this.removeAttribute('srcset'); this.src='{fallback}';"
+    if not file:
+        return format_html('<img src="{}"{}>', fallback or "#", flatatt(attrs))
+    variant_urls = srcset(file.name, variant)
+    if variant_urls is None:
+        return format_html('<img src="{}" loading="lazy"{}>', file.url, flatatt(attrs))
+    src, srcset_value = variant_urls
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" loading="lazy"{}>', src, srcset_value, sizes, flatatt(attrs)
+    )
+
+
+@register.simple_tag
+def category_menu():
+    return get_category_menu()
+
+
+@register.inclusion_tag("catalog/includes/inc_popular.html")
+def popular_products(category_id=None):
+    """
+    Strip of the most viewed products; reads the leaderboard, not the Product table.
+    """
+    return {"popular_products": get_popular_products(category_id)}
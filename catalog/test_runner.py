@@ -0,0 +1,33 @@
+import logging
+
+from django.test.runner import DiscoverRunner
+
+from catalog.counters import discard_view_counters
+
+# Построчный JSON-лог замеров запросов в тестах только засоряет вывод
+QUIET_LOGGERS = ("catalog.instrumentation",)
+
+
+class CatalogTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that silences the per-request instrumentation log and drops view
+    counters buffered by the tests before the test databases are destroyed.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._logger_levels = {}
+        for name in QUIET_LOGGERS:
+            logger = logging.getLogger(name)
+            self._logger_levels[name] = logger.level
+            # assertLogs по-прежнему видит записи: он сам выставляет уровень на время проверки
+            logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, level in self._logger_levels.items():
+            logging.getLogger(name).setLevel(level)
+        super().teardown_test_environment(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        discard_view_counters()
+        super().teardown_databases(old_config, **kwargs)
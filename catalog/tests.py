@@ -1,3 +1,1153 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.contrib.sessions.models import Session
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from PIL import Image
+
+from blog.models import Blog
+from blog.views import BlogListView
+from catalog import counters, images, leaderboard, permissions
+from catalog.admin import VersionAdmin
+from catalog.api import ProductApiView
+from catalog.admin_base import CachedValuesFieldListFilter
+from catalog.leaderboard import LocalLeaderboard, PopularProduct, RedisLeaderboard
+from catalog.media import parse_range, serve_media
+from catalog.models import Category, CategoryPriceStats, Product, Version, supports_update_returning
+from catalog.permissions import PermissionSnapshot
+from catalog.replicas import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter
+from catalog.search import search_products
+from catalog.views import AsyncProductDetailView, AsyncProductListView, ProductListView, ProductSearchView
+from users.models import User
+
+# Страницы рендерятся без collectstatic: манифест хэшированных имён нужен только StaticFilesTest
+_plain_static_storage = override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+
+
+def setUpModule():
+    _plain_static_storage.enable()
+
+
+def tearDownModule():
+    _plain_static_storage.disable()
+
+
+class VersionAllocationConcurrencyTest(TransactionTestCase):
+    threads = 8
+    versions_per_thread = 5
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise unittest.SkipTest("Нужна файловая SQLite или PostgreSQL: потоки не делят in-memory базу")
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        self.product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=100, category=category
+        )
+
+    def _run_in_threads(self, target):
+        errors = []
+        barrier = threading.Barrier(self.threads)
+
+        def worker(index):
+            try:
+                barrier.wait()
+                target(index)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertVersionsConsistent(self, expected_count):
+        numbers = list(
+            Version.objects.filter(product=self.product).order_by("version_number").values_list("version_number", flat=True)
+        )
+        self.assertEqual(numbers, list(range(1, expected_count + 1)))
+
+        current = Version.objects.filter(product=self.product, is_current=True)
+        self.assertEqual(current.count(), 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_version, current.get())
+        self.assertEqual(self.product.last_version_number, expected_count)
+
+    def test_parallel_save(self):
+        def target(index):
+            for step in range(self.versions_per_thread):
+                Version.objects.create(product_id=self.product.pk, version_name=f"{index}-{step}")
+
+        self._run_in_threads(target)
+        self.assertVersionsConsistent(self.threads * self.versions_per_thread)
+
+    def test_parallel_bulk_create(self):
+        def target(index):
+            names = [f"{index}-{step}" for step in range(self.versions_per_thread)]
+            Version.objects.bulk_create_versions(Product.objects.get(pk=self.product.pk), names)
+
+        self._run_in_threads(target)
+        self.assertVersionsConsistent(self.threads * self.versions_per_thread)
+
+
+class VersionSaveStatementsTest(TestCase):
+    def test_statements_per_save(self):
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=category,
+        )
+        first = Version.objects.create(product=product, version_name="1.0")
+        with CaptureQueriesContext(connection) as captured:
+            second = Version.objects.create(product=product, version_name="2.0")
+        statements = [query["sql"] for query in captured if "SAVEPOINT" not in query["sql"]]
+        # Резерв номера, INSERT и один изменяющий CTE на PostgreSQL; на других базах CTE - два запроса
+        self.assertEqual(len(statements), 3 if connection.vendor == "postgresql" else 4, statements)
+
+        first.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual((first.is_current, second.version_number), (False, 2))
+        self.assertEqual((product.current_version, product.last_version_number), (second, 2))
+
+    def test_update_returning_flag(self):
+        mariadb = mock.Mock(vendor="mysql", features=mock.Mock(can_return_columns_from_insert=True))
+        self.assertFalse(supports_update_returning(mariadb))
+
+
+class HotQueryPlanTest(TestCase):
+    """
+    EXPLAIN of the hot queries must keep using their indexes.
+    """
+
+    products = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = Category.objects.bulk_create(
+            Category(category_name=f"Категория {index}", category_description="Описание") for index in range(10)
+        )
+        Product.objects.bulk_create(
+            Product(
+                product_name=f"Продукт {index:04}",
+                product_description="Описание",
+                price=index,
+                category=categories[index % len(categories)],
+                is_published=index % 3 == 0,
+            )
+            for index in range(cls.products)
+        )
+        for product in Product.objects.order_by("pk")[:50]:
+            Version.objects.bulk_create_versions(product, ["1.0", "1.1", "2.0"])
+        User.objects.bulk_create(
+            User(email=f"user{index}@example.com", token=f"token{index}" if index % 2 else None)
+            for index in range(100)
+        )
+        Blog.objects.bulk_create(Blog(title=f"Статья {index}", body="Текст") for index in range(100))
+        cls.category = categories[0]
+        cls.product = Product.objects.order_by("pk").first()
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # На маленькой тестовой таблице планировщик и так выбрал бы полный просмотр
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute("ANALYZE")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Запрос не использует индекс {index_name}:\n{queryset.query}\n{plan}")
+
+    def _list_queryset(self, view_class):
+        view = view_class()
+        view.setup(RequestFactory().get("/"))
+        return view.get_keyset_queryset(view.get_queryset())[:view.paginate_by + 1]
+
+    def test_current_version_by_product(self):
+        queryset = Version.objects.filter(product_id=self.product.pk, is_current=True)
+        self.assertUsesIndex(queryset, "version_current_idx")
+
+    def test_products_by_category_and_publication(self):
+        queryset = Product.objects.filter(category=self.category, is_published=True)
+        self.assertUsesIndex(queryset, "product_category_published_idx")
+
+    def test_product_list_ordering(self):
+        self.assertUsesIndex(self._list_queryset(ProductListView), "product_ordering_idx")
+
+    def test_blog_list_ordering(self):
+        self.assertUsesIndex(self._list_queryset(BlogListView), "blog_created_idx")
+
+    def test_user_by_token(self):
+        self.assertUsesIndex(User.objects.filter(token="token1"), "user_token_idx")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_REPLICA_LAG=5)
+class ReplicaRouterTest(SimpleTestCase):
+    router = ReplicaRouter()
+
+    def route(self, view_class, cookies=None, write=False, model=Product):
+        """
+        Run a request through the middleware and return the read aliases chosen inside it.
+        """
+        reads = []
+
+        def get_response(request):
+            middleware.process_view(request, view_class.as_view(), (), {})
+            reads.append(self.router.db_for_read(model))
+            if write:
+                self.router.db_for_write(model)
+                reads.append(self.router.db_for_read(model))
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(get_response)
+        request = RequestFactory().get("/")
+        request.COOKIES.update(cookies or {})
+        return reads, middleware(request)
+
+    def test_marked_view_reads_from_replica(self):
+        reads, response = self.route(ProductListView)
+        self.assertEqual(reads, ["replica"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_unmarked_view_reads_from_primary(self):
+        self.assertEqual(self.route(ProductSearchView)[0], ["default"])
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+    def test_sessions_always_use_primary(self):
+        self.assertEqual(self.route(ProductListView, model=Session)[0], ["default"])
+
+    def test_write_pins_request_and_client(self):
+        reads, response = self.route(ProductListView, write=True)
+        self.assertEqual(reads, ["replica", "default"])
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_pinned_client_reads_from_primary(self):
+        self.assertEqual(self.route(ProductListView, cookies={PIN_COOKIE: "1"})[0], ["default"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        reads, response = self.route(ProductListView, write=True)
+        self.assertEqual(reads, ["default", "default"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class PermissionSnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.owner = User.objects.create(email="owner@example.com", is_active=True)
+        cls.user = User.objects.create(email="user@example.com", is_active=True)
+        cls.own, cls.foreign = Product.objects.bulk_create(
+            Product(product_name=name, product_description="Описание", price=1, category=category, owner=owner)
+            for name, owner in (("Свой", cls.owner), ("Чужой", None))
+        )
+        cls.moderators = Group.objects.create(name="Модераторы")
+        cls.moderators.permissions.add(Permission.objects.get(codename="can_change_product_description"))
+
+    def flags(self, user):
+        products = [Product.objects.get(pk=self.own.pk), Product.objects.get(pk=self.foreign.pk)]
+        PermissionSnapshot(User.objects.get(pk=user.pk)).annotate_products(products)
+        return [(product.can_edit, product.can_delete) for product in products]
+
+    def test_owner_permissions(self):
+        self.assertEqual(self.flags(self.owner), [(True, True), (False, False)])
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+
+    def test_page_is_evaluated_without_queries(self):
+        products = list(Product.objects.all())
+        snapshot = PermissionSnapshot(User.objects.get(pk=self.owner.pk))
+        with self.assertNumQueries(0):
+            snapshot.annotate_products(products)
+
+    @override_settings(CACHES_ENABLE=True)
+    def test_group_change_invalidates_cached_permissions(self):
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+        self.user.groups.add(self.moderators)
+        self.assertEqual(self.flags(self.user), [(True, False), (True, False)])
+        self.moderators.permissions.clear()
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+
+    @override_settings(CACHES_ENABLE=True)
+    def test_evicted_version_does_not_revive_old_entries(self):
+        cache.clear()
+        self.user.groups.add(self.moderators)
+        permissions.invalidate_all_permissions()
+        self.assertEqual(self.flags(self.user), [(True, False), (True, False)])
+        self.moderators.permissions.clear()
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+        # Ключ версии вытеснен, затем права меняются снова: прежние записи не должны ожить
+        cache.delete(permissions.VERSION_CACHE_KEY)
+        permissions.invalidate_all_permissions()
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+
+    def test_permissions_are_not_cached_per_process(self):
+        self.assertEqual(self.flags(self.user), [(False, False), (False, False)])
+        # Права выданы в другом процессе: сигналы этого процесса их не видели
+        User.groups.through.objects.create(user=self.user, group=self.moderators)
+        self.assertEqual(self.flags(self.user), [(True, False), (True, False)])
+
+    def test_anonymous_user_is_sent_to_login(self):
+        for name in ("catalog:product_update", "catalog:product_delete"):
+            response = self.client.get(reverse(name, args=[self.own.pk]))
+            self.assertRedirects(
+                response, f"{reverse('users:login')}?next={reverse(name, args=[self.own.pk])}",
+                fetch_redirect_response=False,
+            )
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("catalog:product_update", args=[self.own.pk])).status_code, 403)
+
+
+class CategoryPriceStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+
+    def create(self, price, is_published=True):
+        return Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=price, category=self.category,
+            is_published=is_published,
+        )
+
+    def stats(self, is_published=True):
+        stats = CategoryPriceStats.objects.get(category=self.category, is_published=is_published)
+        return stats.product_count, stats.min_price, stats.avg_price, stats.max_price
+
+    def test_deltas_follow_product_changes(self):
+        cheap, middle, expensive = self.create("10.00"), self.create("20.00"), self.create("60.00")
+        self.assertEqual(self.stats(), (3, Decimal("10.00"), Decimal("30.00"), Decimal("60.00")))
+
+        expensive.price = Decimal("30.00")
+        expensive.save()
+        self.assertEqual(self.stats(), (3, Decimal("10.00"), Decimal("20.00"), Decimal("30.00")))
+
+        cheap.is_published = False
+        cheap.save()
+        self.assertEqual(self.stats(), (2, Decimal("20.00"), Decimal("25.00"), Decimal("30.00")))
+        self.assertEqual(self.stats(is_published=False), (1, Decimal("10.00"), Decimal("10.00"), Decimal("10.00")))
+
+        middle.delete()
+        self.assertEqual(self.stats(), (1, Decimal("30.00"), Decimal("30.00"), Decimal("30.00")))
+
+    def test_move_to_another_category(self):
+        other = Category.objects.create(category_name="Другая", category_description="Описание")
+        cheap, expensive = self.create("10.00"), self.create("60.00")
+
+        expensive.category = other
+        expensive.save()
+        self.assertEqual(self.stats(), (1, Decimal("10.00"), Decimal("10.00"), Decimal("10.00")))
+        moved = CategoryPriceStats.objects.get(category=other, is_published=True)
+        self.assertEqual((moved.product_count, moved.min_price, moved.max_price), (1, Decimal("60.00"), Decimal("60.00")))
+
+        # Ошибка при зачислении в новую группу откатывает и списание из старой
+        with mock.patch.object(CategoryPriceStats.objects, "add_price", side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            CategoryPriceStats.objects.change_price(
+                (self.category.pk, True, cheap.price), (other.pk, True, cheap.price)
+            )
+        self.assertEqual(self.stats(), (1, Decimal("10.00"), Decimal("10.00"), Decimal("10.00")))
+
+    def test_failed_stats_update_rolls_back_the_save(self):
+        product = self.create("10.00")
+        product.price = Decimal("20.00")
+        with mock.patch.object(CategoryPriceStats.objects, "change_price", side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            product.save()
+        self.assertEqual(Product.objects.get(pk=product.pk).price, Decimal("10.00"))
+        self.assertEqual(self.stats(), (1, Decimal("10.00"), Decimal("10.00"), Decimal("10.00")))
+
+    def test_delete_uses_stored_state(self):
+        product = self.create("10.00")
+        stale = Product.objects.get(pk=product.pk)
+        product.price = Decimal("40.00")
+        product.save()
+        stale.delete()
+        stats = CategoryPriceStats.objects.get(category=self.category, is_published=True)
+        self.assertEqual((stats.product_count, stats.price_sum), (0, Decimal("0.00")))
+
+    def test_rebuild_matches_incremental_stats(self):
+        for price in ("1.50", "2.25", "7.00"):
+            self.create(price, is_published=price != "2.25")
+        expected = list(CategoryPriceStats.objects.order_by("is_published").values_list(
+            "is_published", "product_count", "price_sum", "min_price", "max_price"
+        ))
+        CategoryPriceStats.objects.update(product_count=0)
+        CategoryPriceStats.objects.rebuild()
+        self.assertEqual(list(CategoryPriceStats.objects.order_by("is_published").values_list(
+            "is_published", "product_count", "price_sum", "min_price", "max_price"
+        )), expected)
+
+
+class MediaRangeTest(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-5000", 1000), (990, 999))
+        # Несколько диапазонов и мусор: отдаётся весь файл
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("items=0-1", 1000))
+        # Неверный диапазон игнорируется, 416 - только для невыполнимого
+        self.assertIsNone(parse_range("bytes=50-10", 1000))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=1000-", 1000)
+        with self.assertRaises(ValueError):
+            parse_range("bytes=-0", 1000)
+
+    def test_serve_media_ranges(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        Path(media_root, "file.bin").write_bytes(bytes(range(100)))
+        with override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=""):
+            def get(header):
+                return serve_media(RequestFactory().get("/media/file.bin", HTTP_RANGE=header), "file.bin")
+
+            partial = get("bytes=10-19")
+            self.assertEqual((partial.status_code, b"".join(partial.streaming_content)), (206, bytes(range(10, 20))))
+            invalid = get("bytes=50-10")
+            self.assertEqual((invalid.status_code, b"".join(invalid.streaming_content)), (200, bytes(range(100))))
+            self.assertEqual(get("bytes=100-").status_code, 416)
+
+
+@override_settings(LEADERBOARD_SIZE=2)
+class LocalLeaderboardTest(SimpleTestCase):
+    def item(self, pk):
+        return PopularProduct(pk, f"Продукт {pk}", Decimal("10.00"), 1, None)
+
+    def test_board_is_bounded_and_ordered(self):
+        board = LocalLeaderboard()
+        for pk, views in ((1, 10), (2, 20), (3, 30), (4, 40), (5, 0)):
+            board.record(self.item(pk), views, ("all",))
+        # В доске остаются capacity() = 4 лучших, наименее просматриваемый вытеснен
+        self.assertEqual([(item.pk, item.views) for item in board.top("all", 2)], [(4, 41), (3, 31)])
+        self.assertNotIn(5, [item.pk for item in board.top("all", 10)])
+        self.assertEqual(len(board.top("all", 10)), 4)
+
+        board.record(self.item(2), 20, ("all",))
+        board.discard(4, ("all",))
+        self.assertEqual([(item.pk, item.views) for item in board.top("all", 2)], [(3, 31), (2, 22)])
+
+
+@override_settings(LEADERBOARD_SIZE=1, CACHES_ENABLE=False)
+class LeaderboardReconcileTest(TestCase):
+    def setUp(self):
+        # reconcile() сбрасывает буфер просмотров: просмотры из других тестов сюда попасть не должны
+        for patcher in (
+            mock.patch.object(leaderboard, "_leaderboard", LocalLeaderboard()),
+            mock.patch.object(counters, "_buffer", counters.LocalCounterBuffer()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_empty_catalog(self):
+        self.assertEqual(leaderboard.reconcile(), 0)
+        self.assertEqual(leaderboard.get_popular_products(), [])
+
+    def test_reading_boards_does_not_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(leaderboard.get_popular_products(), [])
+
+    def test_boards_are_rebuilt_from_views_counter(self):
+        first, second = (
+            Category.objects.create(category_name=name, category_description="Описание") for name in ("А", "Б")
+        )
+        for category, views, is_published in (
+            (first, 5, True), (first, 3, True), (first, 1, True), (first, 50, False),
+            (second, 7, True), (second, 0, True),
+        ):
+            Product.objects.create(
+                product_name=f"Продукт {views}", product_description="Описание", price=1, category=category,
+                is_published=is_published, views_counter=views,
+            )
+
+        # capacity() = 2 на категорию; непросмотренные и неопубликованные не попадают
+        self.assertEqual(leaderboard.reconcile(), 3)
+        self.assertEqual([item.views for item in leaderboard.get_popular_products(limit=5)], [7, 5])
+        self.assertEqual([item.views for item in leaderboard.get_popular_products(first.pk, limit=5)], [5, 3])
+        self.assertEqual([item.name for item in leaderboard.get_popular_products(second.pk)], ["Продукт 7"])
+
+
+class RedisLeaderboardTest(SimpleTestCase):
+    def test_replace_skips_empty_boards(self):
+        client = mock.Mock()
+        client.smembers.return_value = set()
+        with mock.patch.object(RedisLeaderboard, "_client", return_value=client):
+            RedisLeaderboard().replace({"all": {}}, {})
+        pipe = client.pipeline.return_value
+        pipe.zadd.assert_not_called()
+        pipe.hset.assert_not_called()
+        pipe.execute.assert_called_once()
+
+
+@override_settings(REQUEST_INSTRUMENTATION_SAMPLE_RATE=1.0)
+class RequestInstrumentationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(category_name="Категория", category_description="Описание")
+
+    def assertReportsQueries(self, response):
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_sync_request(self):
+        self.assertReportsQueries(self.client.get("/categories/"))
+
+    def test_report_is_logged(self):
+        with self.assertLogs("catalog.instrumentation", "INFO") as logs:
+            self.client.get("/categories/")
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual((report["url_name"], report["status"]), ("catalog:category_list", 200))
+
+    async def test_async_request(self):
+        # Под ASGI запросы к базе идут из sync-потоков, а не из потока middleware
+        self.assertReportsQueries(await self.async_client.get("/categories/"))
+
+
+class CountedStateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=cls.category, is_published=True,
+        )
+
+    def test_unrelated_update_fields_skip_counting(self):
+        self.product.views_counter = 5
+        with self.assertNumQueries(1):
+            self.product.save(update_fields=["views_counter"])
+
+    def test_counted_update_fields(self):
+        self.product.is_published = False
+        self.product.save(update_fields=["is_published"])
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.product_count, self.category.published_count), (1, 0))
+
+    def test_menu_change_invalidates_etag(self):
+        url = f"/product/{self.product.pk}"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.category_name = "Новое название"
+            self.category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_follows_menu_rebuilt_after_ttl(self):
+        url = f"/product/{self.product.pk}"
+        etag = self.client.get(url)["ETag"]
+        # Категорию изменил другой процесс: здесь версию меню никто не сбрасывал
+        Category.objects.filter(pk=self.category.pk).update(category_name="Новое название")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with override_settings(CATEGORY_MENU_TTL=-1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.source = Path(tempfile.mkdtemp())
+        cls.root = Path(tempfile.mkdtemp())
+        (cls.source / "css").mkdir()
+        (cls.source / "css" / "app.css").write_text("body { color: black; }\n" * 50)
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_DIRS=[cls.source],
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "catalog.staticfiles.CompressedManifestStaticFilesStorage"},
+            },
+        )
+        cls.settings.enable()
+        super().setUpClass()
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.hashed_url = staticfiles_storage.url("css/app.css")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings.disable()
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+
+    def test_hashed_name(self):
+        self.assertRegex(self.hashed_url, r"^/static/css/app\.[0-9a-f]{12}\.css$")
+        response = self.client.get(self.hashed_url)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(self.client.get("/static/css/app.css")["Cache-Control"], "public, max-age=60")
+
+    def test_missing_manifest_entry_raises(self):
+        with self.assertRaises(ValueError):
+            staticfiles_storage.url("css/missing.css")
+
+    def test_encoding_negotiation(self):
+        plain = (self.source / "css" / "app.css").read_bytes()
+        response = self.client.get(self.hashed_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+        response = self.client.get(self.hashed_url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), plain)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_brotli_preferred(self):
+        # .br пишется только с пакетом brotli, поэтому сосед создаётся вручную
+        name = self.root / self.hashed_url.removeprefix("/static/")
+        Path(f"{name}.br").write_bytes(b"br")
+        self.addCleanup(Path(f"{name}.br").unlink)
+        response = self.client.get(self.hashed_url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(self.client.get(self.hashed_url, HTTP_ACCEPT_ENCODING="gzip")["Content-Encoding"], "gzip")
+
+    async def test_async_request(self):
+        response = await self.async_client.get(self.hashed_url, headers={"accept-encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual((await self.async_client.get("/static/css/app.css.map")).status_code, 404)
+
+
+class FlushViewCountersCommandTest(SimpleTestCase):
+    @override_settings(CACHES_ENABLE=False)
+    def test_requires_shared_buffer(self):
+        with self.assertRaises(CommandError):
+            call_command("flush_view_counters")
+
+    @override_settings(CACHES_ENABLE=False)
+    def test_reconcile_requires_shared_leaderboard(self):
+        with self.assertRaises(CommandError):
+            call_command("reconcile_leaderboard")
+
+
+class LocalCounterFlushTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=category,
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(counters, "_buffer", counters.LocalCounterBuffer())
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.buffer.incr("catalog.product", self.product.pk, 3)
+
+    def views(self):
+        return Product.objects.values_list("views_counter", flat=True).get(pk=self.product.pk)
+
+    def test_flushed_after_any_request_once_due(self):
+        with override_settings(VIEW_COUNTERS_FLUSH_INTERVAL=60):
+            counters.flush_due_counters()
+        self.assertEqual(self.views(), 0)
+        with override_settings(VIEW_COUNTERS_FLUSH_INTERVAL=0):
+            counters.flush_due_counters()
+        self.assertEqual(self.views(), 3)
+        self.assertFalse(self.buffer.has_pending())
+
+    def test_discard_drops_buffered_views(self):
+        counters.discard_view_counters()
+        self.assertEqual(counters.flush_view_counters(), 0)
+        self.assertEqual(self.views(), 0)
+
+
+class SearchProductsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name="Кухня", category_description="Описание")
+        cls.kettle, cls.mug, cls.plate = Product.objects.bulk_create(
+            Product(product_name=name, product_description=description, price=1, category=category)
+            for name, description in (
+                ("Электрический Чайник", "Стальной корпус"),
+                ("Кружка", "Подходит к любому ЧАЙНИКУ"),
+                ("Тарелка", "Фарфор"),
+            )
+        )
+
+    def search(self, query):
+        return list(search_products(Product.objects.all(), query).order_by("-rank", "pk"))
+
+    def test_case_insensitive_cyrillic(self):
+        self.assertEqual(self.search("чайник"), [self.kettle, self.mug])
+        self.assertEqual(self.search("ТАРЕЛКА"), [self.plate])
+
+    def test_name_matches_rank_higher(self):
+        kettle, mug = self.search("Чайник")
+        self.assertGreater(kettle.rank, mug.rank)
+
+    def test_all_words_required(self):
+        self.assertEqual(self.search("кружка чайник"), [self.mug])
+        self.assertEqual(self.search("кружка фарфор"), [])
+
+
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, name):
+        content = ContentFile(b"")
+        Image.new("RGB", (1000, 500), "red").save(content, "PNG")
+        return default_storage.save(f"products/{name}", content)
+
+    def test_srcset_uses_recorded_availability(self):
+        name = self.upload("a.png")
+        images.generate_variants(name, ("card",))
+        with mock.patch.object(default_storage, "exists") as exists:
+            src, srcset = images.srcset(name, "card")
+        exists.assert_not_called()
+        self.assertIn("a.card-400.webp 400w", srcset)
+
+    def test_image_change_replaces_variants(self):
+        old_name, new_name = self.upload("old.png"), self.upload("new.png")
+        with mock.patch.object(images, "schedule_variants") as schedule:
+            product = Product.objects.create(
+                product_name="Продукт", product_description="Описание", price=1, category=self.category,
+                image=old_name,
+            )
+        schedule.assert_called_once_with(old_name, ("card", "detail"), old_name="")
+
+        product = Product.objects.get(pk=product.pk)
+        with mock.patch.object(images, "schedule_variants") as schedule:
+            product.views_counter = 1
+            product.save()
+            product.save(update_fields=["views_counter"])
+            schedule.assert_not_called()
+            product.image = new_name
+            product.save()
+        schedule.assert_called_once_with(new_name, ("card", "detail"), old_name=old_name)
+
+        images.generate_variants(old_name, ("card",))
+        images._replace_in_background(old_name, new_name, ("card",))
+        self.assertFalse(default_storage.exists(images.variant_name(old_name, "card", 400)))
+        self.assertFalse(images.variants_ready(old_name, "card"))
+        self.assertTrue(default_storage.exists(images.variant_name(new_name, "card", 800)))
+        self.assertTrue(images.variants_ready(new_name, "card"))
+
+    def test_fallback(self):
+        template = Template('{% load my_tags %}{% responsive_image image "detail" fallback="default-image.png" %}')
+        html = template.render(Context({"image": None}))
+        self.assertIn('src="/static/default-image.png"', html)
+        self.assertIn("onerror=", html)
+
+
+class CachedValuesFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email="admin@example.com", is_staff=True, is_superuser=True)
+        Version.objects.bulk_create(Version(version_number=1, version_name=f"Версия {i}") for i in range(3))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_truncated_values_are_announced(self):
+        with mock.patch.object(CachedValuesFieldListFilter, "max_values", 2):
+            response = self.client.get("/admin/catalog/version/", {"is_current__exact": "0"})
+        self.assertContains(response, "Показаны первые 2 значений")
+        self.assertContains(response, '<input type="text" name="version_name"')
+        self.assertContains(response, '<input type="hidden" name="is_current__exact" value="0">')
+        self.assertNotContains(response, "?version_name=%D0%92%D0%B5%D1%80%D1%81%D0%B8%D1%8F+2")
+
+    def test_cache_key_follows_queryset(self):
+        with mock.patch.object(VersionAdmin, "get_queryset", lambda admin, request: Version.objects.none()):
+            self.client.get("/admin/catalog/version/")
+        response = self.client.get("/admin/catalog/version/")
+        self.assertContains(response, "?version_name=%D0%92%D0%B5%D1%80%D1%81%D0%B8%D1%8F+0")
+        self.assertNotContains(response, "Показаны первые")
+
+
+class AsyncProductViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=category, is_published=True,
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(counters, "_buffer", counters.LocalCounterBuffer())
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def get(self, view_class, headers=None, **kwargs):
+        request = AsyncRequestFactory().get("/", headers=headers)
+        request.user = AnonymousUser()
+        response = await view_class.as_view()(request, **kwargs)
+        if response.status_code == 200:
+            # Шаблон рендерится в sync-потоке, как это делает обработчик Django
+            await sync_to_async(response.render)()
+        return response
+
+    async def test_list(self):
+        # Синхронные обращения к кэшу из цикла событий запрещены
+        with mock.patch("catalog.mixins.menu_version", side_effect=AssertionError), \
+                mock.patch("catalog.views.leaderboard_generation", side_effect=AssertionError):
+            response = await self.get(AsyncProductListView)
+            self.assertContains(response, "Продукт")
+            response = await self.get(AsyncProductListView, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_detail_counts_view(self):
+        with mock.patch("catalog.mixins.menu_version", side_effect=AssertionError):
+            response = await self.get(AsyncProductDetailView, pk=self.product.pk)
+        self.assertContains(response, "Продукт")
+        self.assertEqual(self.buffer.drain(), {("catalog.product", self.product.pk): 1})
+
+    async def test_missing_product(self):
+        with self.assertRaises(Http404):
+            await self.get(AsyncProductDetailView, pk=self.product.pk + 1)
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Повторяющиеся даты и NULL: порядок внутри них задаёт только pk
+        for day in (None, 3, 1, None, 3, 2, 3, None, 1):
+            Blog.objects.create(title="Статья", body="Текст", created_at=day and f"2024-01-0{day}")
+        category = Category.objects.create(category_name="Категория", category_description="Описание")
+        for price in (2, 1, 2, 2, 1):
+            Product.objects.create(
+                product_name="Продукт", product_description="Описание", price=price, category=category,
+                is_published=True,
+            )
+
+    @staticmethod
+    def paginate(view_class, cursor=None, page_size=2):
+        view = view_class()
+        view.setup(RequestFactory().get("/", {"cursor": cursor} if cursor else {}))
+        _, page, _, _ = view.paginate_queryset(view.get_queryset(), page_size)
+        return page
+
+    def walk(self, view_class, expected):
+        pages = [self.paginate(view_class)]
+        self.assertFalse(pages[0].has_previous())
+        while pages[-1].has_next():
+            pages.append(self.paginate(view_class, pages[-1].next_cursor))
+        self.assertEqual([row.pk for page in pages for row in page], expected)
+
+        # Обратно от последней страницы: те же страницы в обратном порядке
+        page = pages[-1]
+        for expected_page in reversed(pages[:-1]):
+            page = self.paginate(view_class, page.previous_cursor)
+            self.assertEqual([row.pk for row in page], [row.pk for row in expected_page])
+        self.assertFalse(page.has_previous())
+
+    def test_nulls_and_duplicate_keys(self):
+        # NULL стоит там же, где его ставит сама база при сортировке
+        expected = Blog.objects.order_by(F("created_at").desc(), F("pk").desc()).values_list("pk", flat=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.walk(BlogListView, list(expected))
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"].upper()])
+
+    def test_duplicate_sort_keys(self):
+        expected = Product.objects.order_by("product_name", "product_description", "price", "pk")
+        self.walk(ProductListView, list(expected.values_list("pk", flat=True)))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(Http404):
+            self.paginate(BlogListView, "не-курсор")
+
+    def test_list_etag_without_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("catalog:product_list"))
+        self.assertTrue(response.has_header("ETag"))
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"].upper()])
+
+
+class ConditionalProductPagesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.product = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=cls.category,
+            is_published=True,
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(counters, "_buffer", counters.LocalCounterBuffer())
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertNotModified(self, url, etag):
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list(self):
+        url = reverse("catalog:product_list")
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        self.product.price = 2
+        self.product.save()
+        self.assertModified(url, etag)
+
+    def test_list_changes_on_add_and_delete(self):
+        url = reverse("catalog:product_list")
+        etag = self.client.get(url)["ETag"]
+        other = Product.objects.create(
+            product_name="Другой продукт", product_description="Описание", price=1, category=self.category,
+            is_published=True,
+        )
+        self.assertModified(url, etag)
+
+        etag = self.client.get(url)["ETag"]
+        other.delete()
+        self.assertModified(url, etag)
+
+    def test_detail(self):
+        url = reverse("catalog:product_details", args=[self.product.pk])
+        response = self.client.get(url)
+        self.assertEqual(response["Last-Modified"], http_date(self.product.updated_at.timestamp()))
+        self.assertNotModified(url, response["ETag"])
+        response = self.client.get(url, headers={"If-Modified-Since": response["Last-Modified"]})
+        self.assertEqual(response.status_code, 304)
+
+        Version.objects.create(product=self.product, version_number=1, version_name="Первая", is_current=True)
+        self.assertModified(url, response["ETag"])
+
+    def test_not_modified_detail_counts_view(self):
+        # Повторный запрос браузера с валидатором — тоже просмотр страницы
+        url = reverse("catalog:product_details", args=[self.product.pk])
+        self.assertNotModified(url, self.client.get(url)["ETag"])
+        self.assertEqual(self.buffer.drain(), {("catalog.product", self.product.pk): 2})
+
+
+class ProductApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+        cls.products = [
+            Product.objects.create(
+                product_name=f"Продукт {number}", product_description="Описание", price=number,
+                category=cls.category, is_published=True, image="products/photo.jpg" if number == 1 else None,
+            )
+            for number in range(1, 6)
+        ]
+        Product.objects.create(product_name="Черновик", product_description="Описание", price=1, category=cls.category)
+
+    def get_json(self, url, status=200, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_field_selection(self):
+        data = self.get_json(reverse("catalog:api_product_list"), fields="product_name,price,image,product_name")
+        self.assertEqual(
+            data["results"][0], {"product_name": "Продукт 1", "price": "1.00", "image": "/media/products/photo.jpg"},
+        )
+        self.assertEqual(data["results"][1]["image"], None)
+
+    def test_default_fields(self):
+        data = self.get_json(reverse("catalog:api_product_detail", args=[self.products[0].pk]))
+        self.assertEqual(set(data), set(ProductApiView.default_fields))
+
+    def test_cursor_pagination(self):
+        url = reverse("catalog:api_product_list")
+        data = self.get_json(url, fields="id", limit=2)
+        ids = [row["id"] for row in data["results"]]
+        self.assertIsNone(data["previous"])
+        while data["next"]:
+            data = self.get_json(data["next"])
+            ids += [row["id"] for row in data["results"]]
+        self.assertEqual(ids, [product.pk for product in self.products])
+        # Ссылка назад сохраняет остальные параметры запроса
+        data = self.get_json(data["previous"])
+        self.assertEqual([row["id"] for row in data["results"]], [product.pk for product in self.products[2:4]])
+
+    def test_category_filter(self):
+        data = self.get_json(reverse("catalog:api_product_list"), fields="id", category=self.category.pk + 1)
+        self.assertEqual(data["results"], [])
+
+    def test_bad_requests(self):
+        url = reverse("catalog:api_product_list")
+        for params in ({"fields": "id,password"}, {"fields": ","}, {"limit": "0"}, {"limit": "501"}, {"category": "x"}):
+            with self.subTest(params=params):
+                self.assertIn("error", self.get_json(url, status=400, **params))
+
+    def test_not_found(self):
+        draft = Product.objects.get(product_name="Черновик")
+        for url in (
+            reverse("catalog:api_product_detail", args=[draft.pk]),
+            reverse("catalog:api_product_detail", args=[draft.pk + 1]),
+            f"{reverse('catalog:api_product_list')}?cursor=broken",
+        ):
+            with self.subTest(url=url):
+                self.assertIn("error", self.get_json(url, status=404))
+
+
+class CatalogTransferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(email="owner@example.com", is_active=True)
+        # Названия категорий не уникальны: продукты должны вернуться в свою категорию
+        first = Category.objects.create(category_name="Одежда", category_description="Мужская")
+        second = Category.objects.create(category_name="Одежда", category_description="Женская")
+        cls.products = [
+            Product.objects.create(
+                product_name="Пальто", product_description="Описание", price="10.50", category=first,
+                owner=cls.owner, is_published=True,
+            ),
+            Product.objects.create(product_name="Платье", product_description="Описание", price=20, category=second),
+        ]
+        Version.objects.create(product=cls.products[0], version_number=1, version_name="Первая", is_current=True)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.directory = Path(directory)
+
+    @staticmethod
+    def snapshot():
+        return list(
+            Product.objects.order_by("pk").values_list(
+                "pk", "product_name", "price", "category__category_description", "owner__email", "is_published",
+                "current_version__version_name",
+            )
+        )
+
+    def transfer(self, file_format):
+        path = str(self.directory / f"catalog.{file_format}")
+        call_command("catalog_export", path, stdout=io.StringIO())
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+        call_command("catalog_import", path, stdout=io.StringIO())
+        return path
+
+    def test_round_trip(self):
+        expected = self.snapshot()
+        for file_format in ("jsonl", "csv"):
+            with self.subTest(file_format=file_format):
+                self.transfer(file_format)
+                self.assertEqual(self.snapshot(), expected)
+                self.assertEqual(
+                    sorted(Category.objects.values_list("category_description", "product_count")),
+                    [("Женская", 1), ("Мужская", 1)],
+                )
+
+    def test_existing_category_is_reused(self):
+        existing = Category.objects.create(category_name="Обувь", category_description="")
+        path = self.directory / "catalog.jsonl"
+        path.write_text(
+            '{"model": "category", "id": 7, "category_name": "Обувь", "category_description": ""}\n'
+            '{"model": "product", "id": 100, "product_name": "Ботинки", "product_description": "", '
+            '"price": "1", "category": 7}\n',
+            encoding="utf-8",
+        )
+        call_command("catalog_import", str(path), stdout=io.StringIO())
+        self.assertEqual(Product.objects.get(pk=100).category_id, existing.pk)
+        self.assertEqual(Category.objects.filter(category_name="Обувь").count(), 1)
+
+    def test_ambiguous_category_names_are_rejected(self):
+        path = str(self.directory / "catalog.jsonl")
+        call_command("catalog_export", path, stdout=io.StringIO())
+        Product.objects.all().delete()
+        # Две категории файла с одним названием нельзя сопоставить с одной категорией базы
+        Category.objects.filter(category_description="Женская").delete()
+        with self.assertRaisesMessage(CommandError, "совпадают по названию 'Одежда'"):
+            call_command("catalog_import", path, stdout=io.StringIO())
+
+        # И одну категорию файла — с несколькими категориями базы
+        Category.objects.create(category_name="Одежда", category_description="Детская")
+        self.directory.joinpath("one.jsonl").write_text(
+            '{"model": "category", "id": 1, "category_name": "Одежда", "category_description": ""}\n',
+            encoding="utf-8",
+        )
+        with self.assertRaisesMessage(CommandError, "в базе несколько категорий 'Одежда'"):
+            call_command("catalog_import", str(self.directory / "one.jsonl"), stdout=io.StringIO())
+
+    def test_unknown_category_reference(self):
+        path = self.directory / "catalog.jsonl"
+        path.write_text(
+            '{"model": "product", "id": 1, "product_name": "Пальто", "product_description": "", '
+            '"price": "1", "category": 999}\n',
+            encoding="utf-8",
+        )
+        with self.assertRaisesMessage(CommandError, "категория 999 не найдена"):
+            call_command("catalog_import", str(path), stdout=io.StringIO())
+
+
+class ProductExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="partner@example.com", is_active=True)
+        cls.user.user_permissions.add(Permission.objects.get(codename="view_product"))
+        cls.category = Category.objects.create(category_name="Категория", category_description="Описание")
+        other = Category.objects.create(category_name="Другая", category_description="Описание")
+        cls.published = Product.objects.create(
+            product_name="Продукт", product_description="Описание", price=1, category=cls.category,
+            owner=cls.user, is_published=True,
+        )
+        Product.objects.create(product_name="Черновик", product_description="Описание", price=2, category=cls.category)
+        Product.objects.create(product_name="Чужой", product_description="Описание", price=3, category=other)
+
+    def export(self, **params):
+        response = self.client.get(reverse("catalog:product_export"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_requires_permission(self):
+        response = self.client.get(reverse("catalog:product_export"))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(User.objects.create(email="user@example.com", is_active=True))
+        self.assertEqual(self.client.get(reverse("catalog:product_export")).status_code, 403)
+
+    def test_jsonl(self):
+        self.client.force_login(self.user)
+        records = [json.loads(line) for line in self.export(category=self.category.pk, is_published=1).splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["id"], self.published.pk)
+        self.assertEqual(records[0]["price"], "1.00")
+        self.assertEqual(records[0]["category"], self.category.pk)
+        # Email владельца наружу не отдаётся
+        self.assertNotIn("owner", records[0])
+
+    def test_csv(self):
+        self.client.force_login(self.user)
+        rows = list(csv.DictReader(io.StringIO(self.export(format="csv", category=self.category.pk))))
+        self.assertEqual([row["product_name"] for row in rows], ["Продукт", "Черновик"])
+        self.assertNotIn("owner", rows[0])
+        self.assertNotIn("partner@example.com", self.export(format="csv"))
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from catalog.models import Category, Product, Version
+
+# Поля выгрузки: имя колонки -> путь для values_list. Продукт ссылается на категорию по её id
+# в выгрузке (названия категорий не уникальны), владелец передаётся email
+EXPORT_FIELDS = {
+    "category": {
+        "id": "id",
+        "category_name": "category_name",
+        "category_description": "category_description",
+    },
+    "product": {
+        "id": "id",
+        "product_name": "product_name",
+        "product_description": "product_description",
+        "price": "price",
+        "category": "category_id",
+        # Только для чтения выгрузки человеком, при загрузке не используется
+        "category_name": "category__category_name",
+        "image": "image",
+        "is_published": "is_published",
+        "views_counter": "views_counter",
+        "owner": "owner__email",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+    "version": {
+        "product": "product_id",
+        "version_number": "version_number",
+        "version_name": "version_name",
+        "is_current": "is_current",
+    },
+}
+
+CSV_COLUMNS = ["model"] + list(
+    dict.fromkeys(column for fields in EXPORT_FIELDS.values() for column in fields)
+)
+
+
+def iter_records(model_key, queryset, chunk_size=2000, exclude=()):
+    """
+    Yield plain dicts for the queryset rows without instantiating models.
+    """
+    fields = {column: path for column, path in EXPORT_FIELDS[model_key].items() if column not in exclude}
+    columns = list(fields)
+    for row in queryset.values_list(*fields.values()).iterator(chunk_size=chunk_size):
+        record = {"model": model_key}
+        record.update(zip(columns, row))
+        yield record
+
+
+def iter_catalog_records(chunk_size=2000):
+    """
+    All categories, then products, then versions, so an import can resolve references in one pass.
+    """
+    yield from iter_records("category", Category.objects.order_by("pk"), chunk_size)
+    yield from iter_records("product", Product.objects.order_by("pk"), chunk_size)
+    yield from iter_records(
+        "version", Version.objects.filter(product__isnull=False).order_by("pk"), chunk_size
+    )
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(records, columns=CSV_COLUMNS):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def read_records(stream, file_format):
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
@@ -1,13 +1,33 @@
+from django.conf import settings
 from django.urls import path
+from catalog.api import CategoryApiView, ProductApiView, VersionApiView
 from catalog.apps import CatalogConfig
 from catalog.views import ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView, \
-    VersionCreateView, VersionUpdateView, VersionDeleteView, VersionDetailView, VersionListView
+    VersionCreateView, VersionUpdateView, VersionDeleteView, VersionDetailView, VersionListView, ProductSearchView, \
+    ProductExportView, CategoryListView, PriceStatsView, CategoryDetailView, AsyncProductListView, AsyncProductDetailView
 
 app_name = CatalogConfig.name
 
+# Под ASGI (ASYNC_VIEWS=True) горячие страницы обслуживают async-версии представлений
+if settings.ASYNC_VIEWS:
+    list_view, detail_view = AsyncProductListView, AsyncProductDetailView
+else:
+    list_view, detail_view = ProductListView, ProductDetailView
+
 urlpatterns = [
-    path("", ProductListView.as_view(), name="product_list"),
-    path('product/<int:pk>', ProductDetailView.as_view(), name="product_details"),
+    path("", list_view.as_view(), name="product_list"),
+    path("search/", ProductSearchView.as_view(), name="product_search"),
+    path("export/", ProductExportView.as_view(), name="product_export"),
+    path("price-stats/", PriceStatsView.as_view(), name="price_stats"),
+    path("categories/", CategoryListView.as_view(), name="category_list"),
+    path("category/<int:pk>/", CategoryDetailView.as_view(), name="category_detail"),
+    path("api/products/", ProductApiView.as_view(), name="api_product_list"),
+    path("api/products/<int:pk>/", ProductApiView.as_view(), name="api_product_detail"),
+    path("api/categories/", CategoryApiView.as_view(), name="api_category_list"),
+    path("api/categories/<int:pk>/", CategoryApiView.as_view(), name="api_category_detail"),
+    path("api/versions/", VersionApiView.as_view(), name="api_version_list"),
+    path("api/versions/<int:pk>/", VersionApiView.as_view(), name="api_version_detail"),
+    path('product/<int:pk>', detail_view.as_view(), name="product_details"),
     path("create/", ProductCreateView.as_view(), name="product_create"),
     path("product/<int:pk>/update", ProductUpdateView.as_view(), name="product_update"),
     path("product/<int:pk>/delete/", ProductDeleteView.as_view(), name="product_delete"),
@@ -1,37 +1,198 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy, reverse
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from catalog.counters import arecord_view, record_view
 from catalog.forms import ProductForm, VersionForm
-from catalog.models import Product, Version
+from catalog.leaderboard import aleaderboard_generation, arecord_product_view, leaderboard_generation, \
+    record_product_view
+from catalog.mixins import AsyncKeysetListMixin, AsyncSingleObjectMixin, ConditionalResponseMixin, \
+    ProductObjectPermissionMixin, ProductPermissionsMixin
+from catalog.models import Category, CategoryPriceStats, Product, Version
+from catalog.pagination import KeysetPaginationMixin
+from catalog.search import search_products
+from catalog.transfer import EXPORT_FIELDS, csv_lines, iter_records, jsonl_lines
 
 
-class ProductListView(ListView):
+class ProductListView(ConditionalResponseMixin, ProductPermissionsMixin, KeysetPaginationMixin, ListView):
     model = Product
+    use_read_replica = True
+    paginate_by = 12
+    keyset_ordering = ("product_name", "product_description", "price", "pk")
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('current_version')
+
+    def paginate_queryset(self, queryset, page_size):
+        # Страница загружается один раз: по ней считается и ETag, и рендеринг
+        if not hasattr(self, 'page'):
+            _, self.page, _, _ = super().paginate_queryset(queryset, page_size)
+        return None, self.page, self.page.object_list, self.page.has_other_pages()
+
+    def get_etag_parts(self):
+        queryset = self.get_queryset()
+        _, page, _, _ = self.paginate_queryset(queryset, self.get_paginate_by(queryset))
+        # Блок популярных продуктов меняется при каждой сверке рейтинга
+        return self.get_page_etag_parts(page), leaderboard_generation()
+
+    @staticmethod
+    def get_page_etag_parts(page):
+        """
+        The rows of the page and its neighbour links, without aggregates over the whole table.
+        """
+        # Изменение продукта меняет его updated_at, добавление или удаление — состав страницы
+        # или её ссылки на соседние страницы
+        rows = tuple((product.pk, product.updated_at) for product in page)
+        return rows, page.next_cursor, page.previous_cursor
+
+
+class AsyncProductListView(AsyncKeysetListMixin, ProductListView):
+    async def aget_etag_parts(self):
+        return self.get_page_etag_parts(self.page), await aleaderboard_generation()
+
+
+class ProductSearchView(ProductPermissionsMixin, ListView):
+    model = Product
+    template_name = "catalog/product_search.html"
+    results_limit = 48
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        query = self.get_query()
+        if not query:
+            return Product.objects.none()
+        queryset = search_products(super().get_queryset().select_related('current_version'), query)
+        return queryset.order_by('-rank', 'pk')[:self.results_limit]
+
+    def get_context_data(self, *args, **kwargs):
+        context_data = super().get_context_data(*args, **kwargs)
+        context_data['query'] = self.get_query()
+        return context_data
+
+
+class CategoryListView(ListView):
+    model = Category
+
+
+class CategoryDetailView(ProductPermissionsMixin, KeysetPaginationMixin, ListView):
+    """
+    Published products of one category.
+    """
+
+    template_name = "catalog/category_detail.html"
+    paginate_by = 12
+    keyset_ordering = ("product_name", "product_description", "price", "pk")
+
+    def get_category(self):
+        if not hasattr(self, 'category'):
+            self.category = get_object_or_404(Category, pk=self.kwargs['pk'])
+        return self.category
+
+    def get_queryset(self):
+        return Product.objects.filter(category=self.get_category(), is_published=True).select_related('current_version')
 
     def get_context_data(self, *args, **kwargs):
         context_data = super().get_context_data(*args, **kwargs)
-        for product in context_data['product_list']:
-            active_version = Version.objects.filter(product=product, version_sign=True)
-            if active_version:
-                product.active_version = active_version.last().version_name
-            else:
-                product.active_version = 'Отсутствует'
-
-            product.can_unpublish = self.request.user.has_perm('catalog.can_unpublish_product')
-            product.can_edit_as_moderator = self.request.user.has_perm('catalog.can_change_product_description') or \
-                                            self.request.user.has_perm('catalog.can_change_product_category')
+        context_data['category'] = self.get_category()
         return context_data
 
-class ProductDetailView(DetailView):
+
+class PriceStatsView(PermissionRequiredMixin, ListView):
+    """
+    Price statistics per category and publish state, read from the maintained table only.
+    """
+
+    permission_required = 'catalog.view_categorypricestats'
+    template_name = 'catalog/price_stats.html'
+    use_read_replica = True
+
+    def get_queryset(self):
+        return (
+            CategoryPriceStats.objects.filter(product_count__gt=0)
+            .select_related('category')
+            .only('category__category_name', *(field.attname for field in CategoryPriceStats._meta.concrete_fields))
+            .order_by('category__category_name', 'category_id', '-is_published')
+        )
+
+
+class ProductExportView(PermissionRequiredMixin, View):
+    """
+    Streams the product catalog as CSV or JSON Lines, row by row.
+    """
+
+    permission_required = 'catalog.view_product'
+    chunk_size = 2000
+    # Email владельца не отдаём партнёрам
+    excluded_columns = ('owner',)
+
+    def get_queryset(self):
+        queryset = Product.objects.order_by('pk')
+        category = self.request.GET.get('category')
+        if category and category.isdigit():
+            queryset = queryset.filter(category_id=category)
+        is_published = self.request.GET.get('is_published')
+        if is_published in ('0', '1'):
+            queryset = queryset.filter(is_published=is_published == '1')
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        records = iter_records('product', self.get_queryset(), self.chunk_size, exclude=self.excluded_columns)
+        if request.GET.get('format') == 'csv':
+            columns = [column for column in EXPORT_FIELDS['product'] if column not in self.excluded_columns]
+            lines, content_type, extension = csv_lines(records, columns), 'text/csv', 'csv'
+        else:
+            lines, content_type, extension = jsonl_lines(records), 'application/x-ndjson', 'jsonl'
+
+        response = StreamingHttpResponse(lines, content_type=f'{content_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="products.{extension}"'
+        return response
+
+
+class ProductDetailView(ConditionalResponseMixin, ProductPermissionsMixin, DetailView):
     model = Product
+    use_read_replica = True
     template_name = "catalog/product_details.html"
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('current_version')
+
     def get_object(self, queryset=None):
-        self.object = super().get_object(queryset)
-        self.object.views_counter += 1
-        self.object.save()
+        # Объект нужен и для ETag, и для рендеринга: загружаем его один раз
+        if not hasattr(self, 'object'):
+            self.object = super().get_object(queryset)
         return self.object
 
+    def get_etag_parts(self):
+        product = self.get_object()
+        version = product.current_version
+        return product.pk, product.updated_at, version and (version.pk, version.version_name, version.version_number)
+
+    def get_last_modified(self):
+        return self.get_object().updated_at
+
+    def get(self, request, *args, **kwargs):
+        # Просмотр учитывается и для ответа 304
+        record_view(self.get_object())
+        record_product_view(self.object)
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        # В базу просмотр попадёт при очередном сбросе счётчиков, на странице учитываем его сразу
+        self.object.views_counter += 1
+        return super().get_context_data(**kwargs)
+
+
+class AsyncProductDetailView(AsyncSingleObjectMixin, ProductDetailView):
+    async def aprepare(self):
+        await super().aprepare()
+        await arecord_view(self.object)
+        await arecord_product_view(self.object)
+
+
 class ProductCreateView(CreateView, LoginRequiredMixin):
     model = Product
     form_class = ProductForm
@@ -45,7 +206,7 @@ class ProductCreateView(CreateView, LoginRequiredMixin):
         return super().form_valid(form)
 
 
-class ProductUpdateView(UpdateView):
+class ProductUpdateView(ProductObjectPermissionMixin, UpdateView):
     model = Product
     form_class = ProductForm
     success_url = reverse_lazy('catalog:product_list')
@@ -53,9 +214,6 @@ class ProductUpdateView(UpdateView):
     def get_success_url(self):
         return reverse("catalog:product_details", args=[self.kwargs.get('pk')])
 
-class ProductDeleteView(DeleteView):
-    model = Product
-    success_url = reverse_lazy('catalog:product_list')
 
 class VersionCreateView(CreateView):
     model = Version
@@ -83,6 +241,7 @@ class VersionUpdateView(UpdateView):
     success_url = reverse_lazy('catalog:product_list')
 
 
-class ProductDeleteView(DeleteView):
+class ProductDeleteView(ProductObjectPermissionMixin, DeleteView):
     model = Product
+    permission_flag = 'can_delete'
     success_url = reverse_lazy('catalog:product_list')
@@ -32,7 +32,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: время "total" включает остальные middleware
+    'catalog.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'catalog.staticfiles.StaticFilesMiddleware',
+    'catalog.replicas.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,6 +79,32 @@ DATABASES = {
     }
 }
 
+# Необязательная реплика для чтения: те же учётные данные, другой хост или другое имя базы
+if os.getenv('DATABASE_REPLICA_HOST') or os.getenv('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DATABASE_REPLICA_HOST', DATABASES['default']['HOST']),
+        'NAME': os.getenv('DATABASE_REPLICA_NAME', DATABASES['default']['NAME']),
+        # В тестах реплика смотрит в тестовую основную базу
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['catalog.replicas.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает только с основной базы: допустимое отставание реплики
+DATABASE_REPLICA_LAG = int(os.getenv('DATABASE_REPLICA_LAG', '5'))
+
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    # Владелец продукта может просматривать, менять и удалять свой продукт
+    'catalog.permissions.OwnerPermissionBackend',
+]
+
+# Время жизни (в секундах) кэша прав пользователя в Redis (только с CACHES_ENABLE);
+# при изменении групп и прав кэш сбрасывается сразу
+PERMISSIONS_CACHE_TIMEOUT = int(os.getenv('PERMISSIONS_CACHE_TIMEOUT', '3600'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -111,6 +141,15 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = (BASE_DIR / 'static',)
 
+# collectstatic собирает сюда файлы с хэшем в имени и сжатыми .gz/.br копиями,
+# без DEBUG их раздаёт catalog.staticfiles.StaticFilesMiddleware
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'catalog.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -120,6 +159,19 @@ MEDIA_URL = 'media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR / 'media/')
 
+# Передача загруженных файлов фронт-прокси: '' (отдаёт Django), 'x-accel' (nginx) или 'x-sendfile'
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '')
+
+# internal-location nginx, указывающий на MEDIA_ROOT, для X-Accel-Redirect
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Сколько секунд браузер может не перепроверять загруженные файлы
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', '86400'))
+
+# Фоновое построение WebP-вариантов загруженных изображений
+IMAGE_VARIANTS_WORKERS = int(os.getenv('IMAGE_VARIANTS_WORKERS', '2'))
+IMAGE_VARIANTS_QUALITY = 80
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.yandex.ru"
 EMAIL_PORT = 465
@@ -133,19 +185,73 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 EMAIL_ADMIN = EMAIL_HOST_USER
 
+# Очередь писем: число попыток и базовая задержка (сек) перед повтором, удваивается с каждой попыткой
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
 AUTH_USER_MODEL = "users.User"
 
 PHONENUMBER_DEFAULT_REGION = "RU"
 
 LOGIN_REDIRECT_URL = "/"
+# Куда отправляются анонимные пользователи со страниц, требующих входа
+LOGIN_URL = "users:login"
 LOGOUT_REDIRECT_URL = "/"
 
+# Запрещённые слова для названий и описаний продуктов, дополняются таблицей ForbiddenWord
+FORBIDDEN_WORDS = ['казино', 'криптовалюта', 'крипта', 'биржа', 'дешево', 'бесплатно', 'обман', 'полиция', 'радар']
+
+# Как часто (в секундах) каждый процесс перечитывает таблицу запрещённых слов
+FORBIDDEN_WORDS_TTL = int(os.getenv('FORBIDDEN_WORDS_TTL', '60'))
+
+# Async-версии списков и карточек продуктов и статей для запуска под ASGI (uvicorn)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Начиная с этого числа строк списки в админке показывают оценку планировщика вместо COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '10000'))
+
+# Время жизни (в секундах) кэша значений фильтров в админке
+ADMIN_FILTER_CACHE_TIMEOUT = int(os.getenv('ADMIN_FILTER_CACHE_TIMEOUT', '300'))
+
+# Как часто (в секундах) каждый процесс перечитывает меню категорий
+CATEGORY_MENU_TTL = int(os.getenv('CATEGORY_MENU_TTL', '300'))
+
 CACHES_ENABLE = os.getenv('CACHES_ENABLE', 'False') == 'True'
 
+# Максимальное время (в секундах), на которое счётчики просмотров в базе могут отставать
+VIEW_COUNTERS_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNTERS_FLUSH_INTERVAL', '60'))
+
+# Сколько самых просматриваемых продуктов показывать на главной и в категориях
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '8'))
+
 if CACHES_ENABLE:
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            # django-redis: счётчики просмотров и рейтинг берут из него соединение с Redis
+            "BACKEND": "catalog.redis_cache.InstrumentedRedisCache",
             "LOCATION": os.getenv('LOCATION'),
         }
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "catalog.instrumentation.InstrumentedLocMemCache",
+        }
+    }
+
+# Тесты сбрасывают накопленные ими просмотры до удаления тестовой базы
+TEST_RUNNER = "catalog.test_runner.CatalogTestRunner"
+
+# Доля запросов, для которых считаются SQL, рендеринг и кэш (заголовок Server-Timing и лог)
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('REQUEST_INSTRUMENTATION_SAMPLE_RATE', '0.1'))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "catalog.instrumentation": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
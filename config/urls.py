@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.conf import settings
 from django.urls import path, include
-from django.conf.urls.static import static
+
+from catalog.media import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("catalog.urls", namespace="catalog")),
     path('blog/', include('blog.urls', namespace='blog')),
-    path('users/', include('users.urls', namespace='users'))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('users/', include('users.urls', namespace='users')),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name="media"),
+]
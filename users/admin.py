@@ -1,8 +1,15 @@
 from django.contrib import admin
 
-from users.models import User
+from catalog.admin_base import LargeTableAdmin
+from users.models import EmailOutbox, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = ("username", "email", "phone")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "recipients", "attempts", "send_after", "is_failed")
+    list_filter = ("is_failed",)
@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди пачками через одно SMTP-соединение"
+
+    # На сколько секунд взятые в работу письма скрываются от других воркеров
+    claim_timeout = 300
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Писем за одно соединение")
+        parser.add_argument("--loop", action="store_true", help="Работать постоянно, проверяя очередь")
+        parser.add_argument("--interval", type=float, default=5, help="Пауза между проверками очереди, сек")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_batch(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f"Отправлено писем: {sent}, ошибок: {failed}"))
+            if not options["loop"]:
+                break
+            # Полная пачка означает, что в очереди ещё есть письма: продолжаем без паузы
+            if sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
+
+    def send_batch(self, batch_size):
+        emails = self.claim_batch(batch_size)
+        if not emails:
+            return 0, 0
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            # SMTP недоступен: вся пачка откладывается по обычной схеме повторов, воркер продолжает работу
+            for email in emails:
+                self.register_failure(email, e)
+            return 0, len(emails)
+
+        sent = failed = 0
+        delivered = []
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    self.register_failure(email, e)
+                    failed += 1
+                else:
+                    delivered.append(email.pk)
+                    sent += 1
+        finally:
+            connection.close()
+
+        # Отправленные письма удаляются: в них могут быть одноразовые ссылки и пароли
+        EmailOutbox.objects.filter(pk__in=delivered).delete()
+        return sent, failed
+
+    def claim_batch(self, batch_size):
+        """
+        Take up to batch_size due emails and postpone them by claim_timeout seconds.
+
+        The row locks are held only for this short transaction, not during SMTP I/O; other
+        workers skip the claimed emails, and they come back if this worker dies mid-batch.
+        """
+        with transaction.atomic():
+            # skip_locked позволяет запускать несколько воркеров без повторной отправки
+            emails = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(is_failed=False, send_after__lte=timezone.now())
+                .order_by("send_after")[:batch_size]
+            )
+            if emails:
+                EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+                    send_after=timezone.now() + timedelta(seconds=self.claim_timeout)
+                )
+        return emails
+
+    @staticmethod
+    def register_failure(email, error):
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.is_failed = True
+        else:
+            delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+            email.send_after = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=["attempts", "last_error", "is_failed", "send_after"])
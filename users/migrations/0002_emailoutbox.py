@@ -0,0 +1,75 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255, verbose_name="Тема")),
+                ("message", models.TextField(verbose_name="Текст письма")),
+                (
+                    "from_email",
+                    models.CharField(max_length=254, verbose_name="Отправитель"),
+                ),
+                ("recipients", models.JSONField(verbose_name="Получатели")),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Попыток отправки"
+                    ),
+                ),
+                (
+                    "send_after",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Отправить после",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Последняя ошибка"),
+                ),
+                (
+                    "is_failed",
+                    models.BooleanField(
+                        default=False, verbose_name="Доставка прекращена"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Письмо в очереди",
+                "verbose_name_plural": "Очередь писем",
+                "ordering": ["send_after"],
+                "indexes": [
+                    models.Index(
+                        fields=["is_failed", "send_after"],
+                        name="users_outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.2 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_emailoutbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("token__isnull", False)),
+                fields=["token"],
+                name="user_token_idx",
+            ),
+        ),
+    ]
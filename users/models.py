@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
 from catalog.utils import upload_to
@@ -27,6 +28,37 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            # Токен есть только у неподтверждённых пользователей, ищется при подтверждении email
+            models.Index(fields=["token"], name="user_token_idx", condition=models.Q(token__isnull=False)),
+        ]
 
     def __str__(self):
         return self.email
+
+
+class EmailOutbox(models.Model):
+    """
+    Email waiting to be delivered by the send_outbox command
+    """
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    message = models.TextField(verbose_name="Текст письма")
+    from_email = models.CharField(max_length=254, verbose_name="Отправитель")
+    recipients = models.JSONField(verbose_name="Получатели")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток отправки")
+    send_after = models.DateTimeField(default=timezone.now, verbose_name="Отправить после")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    is_failed = models.BooleanField(default=False, verbose_name="Доставка прекращена")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        ordering = ["send_after"]
+        indexes = [
+            models.Index(fields=["is_failed", "send_after"], name="users_outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.recipients)}"
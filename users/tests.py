@@ -1,3 +1,76 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from users.models import EmailOutbox
+from users.utils import queue_email
+
+
+class FailingRecipientEmailBackend(EmailBackend):
+    """
+    locmem backend that rejects messages to fail@example.com.
+    """
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "fail@example.com" in message.to:
+                raise ConnectionError("Получатель отклонён")
+        return super().send_messages(messages)
+
+
+class UnreachableEmailBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("SMTP недоступен")
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60)
+class SendOutboxTest(TestCase):
+    def send(self):
+        call_command("send_outbox", stdout=StringIO())
+
+    def make_due(self):
+        EmailOutbox.objects.update(send_after=timezone.now())
+
+    @override_settings(EMAIL_BACKEND="users.tests.FailingRecipientEmailBackend")
+    def test_delivered_deleted_and_failed_backed_off(self):
+        queue_email("Тема", "Текст", ["ok@example.com"])
+        failing = queue_email("Тема", "Текст", ["fail@example.com"])
+
+        self.send()
+        self.assertEqual([message.to for message in mail.outbox], [["ok@example.com"]])
+        self.assertEqual(list(EmailOutbox.objects.values_list("pk", flat=True)), [failing.pk])
+        failing.refresh_from_db()
+        self.assertEqual((failing.attempts, failing.is_failed), (1, False))
+        self.assertGreater(failing.send_after, timezone.now())
+        self.assertIn("Получатель отклонён", failing.last_error)
+
+        # Отложенное письмо не отправляется раньше срока
+        self.send()
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+
+        self.make_due()
+        self.send()
+        failing.refresh_from_db()
+        self.assertEqual((failing.attempts, failing.is_failed), (2, True))
+
+        # Письма с прекращённой доставкой больше не берутся в работу
+        self.make_due()
+        self.send()
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 2)
+
+    @override_settings(EMAIL_BACKEND="users.tests.UnreachableEmailBackend")
+    def test_connection_error_backs_off_batch(self):
+        emails = [queue_email("Тема", "Текст", [f"user{index}@example.com"]) for index in range(3)]
+
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.attempts, email.is_failed), (1, False))
+            self.assertGreater(email.send_after, timezone.now())
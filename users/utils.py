@@ -1,28 +1,38 @@
-from django.core.mail import send_mail
 from string import ascii_letters, digits
 from random import choices
 
 from config.settings import EMAIL_HOST_USER
+from users.models import EmailOutbox
+
+
+def queue_email(subject, message, recipient_list, from_email=EMAIL_HOST_USER):
+    """
+    Put the email into the outbox, the send_outbox command delivers it.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+    )
 
 
 def send_email_confirm(url, email):
-    send_mail(
+    queue_email(
         subject="Подтвержение регистрации в магазине МЕЧТА",
         message=f"Для подтверждения регистрации, перейдите по ссылке {url}",
-        from_email=EMAIL_HOST_USER,
         recipient_list=[email],
     )
 
 
 def send_email_reset_password(password, email):
-    send_mail(
+    queue_email(
         subject="Сброс пароля в магазине МЕЧТА",
         message=f"Новый пароль {password}",
-        from_email=EMAIL_HOST_USER,
         recipient_list=[email],
     )
 
 
 def generate_random_password():
     data = ascii_letters + digits
-    return "".join(choices(data, k=8))
\ No newline at end of file
+    return "".join(choices(data, k=8))